@@ -0,0 +1,68 @@
+"""
+    Basket items deletion benchmark.
+
+    Measure removing and emptying of large static basket by set-based deletion
+    and by Django deletion collector, which is used when deletion signals are received.
+
+    Usage:
+        python -m benchmarks.deletion --size 1000
+"""
+import argparse
+import sys
+
+from .utils import setup_django, measure
+
+
+def fill_basket(size: int):
+    from django_basket.contrib.selectors import get_empty_basket
+    from example_apps.products.models import Product, BasketItem
+
+    product = Product.objects.create(title="product", price=1)
+    BasketItem.objects.bulk_create([
+        BasketItem(product=product, amount=1, price=product.price) for _ in range(size)
+    ])
+    basket = get_empty_basket()
+    basket.basket_items.add(*BasketItem.objects.filter(basket__isnull=True))
+    return basket
+
+
+def run(size: int) -> dict:
+    from django.db.models.signals import pre_delete
+    from django_basket.contrib.basket import BasketAggregator
+    from example_apps.products.models import BasketItem
+
+    def receiver(**kwargs):
+        pass
+
+    results = {}
+    for path in ("set-based", "with receivers"):
+        if path == "with receivers":
+            # Any deletion receiver disables raw deletion
+            pre_delete.connect(receiver, sender=BasketItem)
+        try:
+            basket = fill_basket(size)
+            items = list(basket.basket_items.all())
+            with measure() as results[f"remove, {path}"]:
+                BasketAggregator(basket).remove(items)
+
+            basket = fill_basket(size)
+            with measure() as results[f"empty, {path}"]:
+                BasketAggregator(basket).empty_basket()
+        finally:
+            pre_delete.disconnect(receiver, sender=BasketItem)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="Amount of basket items")
+    args = parser.parse_args(argv)
+
+    setup_django("benchmarks.settings")
+    for name, result in run(args.size).items():
+        print(f"{name}: {result['time'] * 1000:.2f} ms, {result['queries']} queries")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+from django_basket.tests.settings.dynamic_settings import *  # noqa: F401,F403
+
+# Tables are created from models, package doesn't ship migrations
+MIGRATION_MODULES = {
+    "django_basket": None,
+    "products": None,
+}
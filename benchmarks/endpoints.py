@@ -0,0 +1,197 @@
+"""
+    Basket endpoints and aggregator benchmark.
+
+    Seed baskets of different sizes in static and dynamic basket item modes,
+    measure latency and queries amount of every basket endpoint and aggregator method.
+    Every mode is run in separate interpreter, basket item mode is applied on models definition.
+
+    Usage:
+        python -m benchmarks.endpoints --sizes 1 10 100 1000 --repeat 5 --output results.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from .utils import setup_django, measure
+
+MODES = {
+    "static": "benchmarks.settings",
+    "dynamic": "benchmarks.dynamic_settings",
+}
+
+
+def create_basket_items(size: int) -> list:
+    from django.db.models import Max
+    from example_apps.products.models import Product, BasketItem
+
+    product = Product.objects.create(title="product", price=1)
+    last_pk = BasketItem.objects.aggregate(last_pk=Max("pk"))["last_pk"] or 0
+    BasketItem.objects.bulk_create([
+        BasketItem(product=product, amount=1, price=product.price) for _ in range(size)
+    ])
+    return list(BasketItem.objects.filter(pk__gt=last_pk).order_by("pk"))
+
+
+def seed_basket(client, size: int):
+    """Create session basket of client with `size` lines"""
+    from django_basket.contrib.basket import BasketAggregator
+    from django_basket.models import get_basket_model
+
+    client.get("/api/basket/receive/")
+    basket = get_basket_model().objects.get(session_id=client.session.session_key)
+    aggregator = BasketAggregator(basket)
+    aggregator.empty_basket()
+    aggregator.add_many(create_basket_items(size))
+    return basket
+
+
+def get_line_pk(basket) -> int:
+    return basket.basket_items.order_by("pk").values_list("pk", flat=True).first()
+
+
+def bench(results: Dict[str, list], target: str, func: Callable, prepare: Callable = None):
+    """Measure function, `prepare` result is passed to it and isn't measured"""
+    argument = prepare() if prepare else None
+    with measure() as result:
+        response = func(argument) if prepare else func()
+    status_code = getattr(response, "status_code", None)
+    if status_code is not None and status_code >= 400:
+        raise RuntimeError(f"{target} responded {status_code}: {getattr(response, 'data', None)}")
+    results[target].append(result)
+
+
+def run_mode(mode: str, sizes: List[int], repeat: int) -> List[dict]:
+    setup_django(MODES[mode])
+    from django.test.utils import setup_test_environment
+    from rest_framework.test import APIClient
+    from django_basket.contrib.basket import BasketAggregator
+
+    setup_test_environment()
+    rows = []
+    for size in sizes:
+        client = APIClient()
+        basket = seed_basket(client, size)
+        results = defaultdict(list)
+        for _ in range(repeat):
+            # Endpoints
+            bench(results, "GET basket/receive/", lambda: client.get("/api/basket/receive/"))
+            bench(results, "GET basket/amount/", lambda: client.get("/api/basket/amount/"))
+            bench(
+                results, "POST basket/add/",
+                lambda items: client.post("/api/basket/add/", {"basket_items": [items[0].pk]}, format="json"),
+                prepare=lambda: create_basket_items(1),
+            )
+            bench(
+                results, "POST basket/remove/",
+                lambda pk: client.post("/api/basket/remove/", {"basket_items": [pk]}, format="json"),
+                prepare=lambda: get_line_pk(basket),
+            )
+            bench(
+                results, "POST basket/create/items/",
+                lambda items: client.post(
+                    "/api/basket/create/items/",
+                    {"basket_items": [{"product": items[0].product_id, "amount": 1}]},
+                    format="json",
+                ),
+                prepare=lambda: create_basket_items(1),
+            )
+            # Aggregator methods
+            bench(
+                results, "BasketAggregator.add_many",
+                lambda items: BasketAggregator(basket).add_many(items),
+                prepare=lambda: create_basket_items(1),
+            )
+            bench(
+                results, "BasketAggregator.remove",
+                lambda items: BasketAggregator(basket).remove(items),
+                prepare=lambda: list(basket.basket_items.order_by("pk")[:1]),
+            )
+            bench(results, "BasketAggregator.calculate_price", lambda: BasketAggregator(basket).calculate_price())
+            bench(results, "BasketAggregator.reconcile_price", lambda: BasketAggregator(basket).reconcile_price())
+            # Emptying endpoints and method are measured on re-seeded basket
+            bench(
+                results, "POST basket/clean/",
+                lambda _: client.post("/api/basket/clean/"),
+                prepare=lambda: seed_basket(client, size),
+            )
+            bench(
+                results, "BasketAggregator.empty_basket",
+                lambda seeded: BasketAggregator(seeded).empty_basket(),
+                prepare=lambda: seed_basket(client, size),
+            )
+            basket = seed_basket(client, size)
+
+        for target, measurements in results.items():
+            timings = [measurement["time"] * 1000 for measurement in measurements]
+            rows.append({
+                "mode": mode,
+                "size": size,
+                "target": target,
+                "median_ms": round(statistics.median(timings), 3),
+                "min_ms": round(min(timings), 3),
+                "max_ms": round(max(timings), 3),
+                "queries": max(measurement["queries"] for measurement in measurements),
+            })
+    return rows
+
+
+def get_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], check=True, stdout=subprocess.PIPE, universal_newlines=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="Basket item modes")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1, 10, 100, 1000], help="Basket lines amounts")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per target")
+    parser.add_argument("--output", help="Path of JSON results file")
+    parser.add_argument("--mode", choices=list(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        # Child interpreter of single mode, results are passed to parent by stdout
+        print(json.dumps(run_mode(args.mode, args.sizes, args.repeat)))
+        return 0
+
+    rows = []
+    for mode in args.modes:
+        output = subprocess.run(
+            [
+                sys.executable, "-m", "benchmarks.endpoints", "--mode", mode,
+                "--sizes", *map(str, args.sizes), "--repeat", str(args.repeat),
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout
+        rows.extend(json.loads(output.strip().splitlines()[-1]))
+
+    for row in rows:
+        print(f"{row['mode']:<8}{row['size']:>6}  {row['target']:<36}"
+              f"{row['median_ms']:>10.3f} ms {row['queries']:>6} queries")
+    if args.output:
+        import django
+        results = {
+            "revision": get_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "repeat": args.repeat,
+            "results": rows,
+        }
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+    Concurrent basket load test.
+
+    Simulate shopper sessions by threads, every virtual shopper has own Django test client,
+    so requests pass through middlewares, sessions and basket resolving as in production.
+    Scenarios:
+        browse - anonymous session reads basket and items amount
+        shopper - anonymous session adds items one by one, reads basket and removes item
+        login-merge - anonymous session fills basket and logs in, so session key is cycled
+            and basket is merged. Sessions of the same account log in concurrently.
+
+    Database is file based SQLite in WAL mode, other database (like local Postgres)
+    is configured by `--settings` module. Duplicate basket is more than one basket
+    of shopper session or account, which is found right after basket request.
+
+    Usage:
+        python -m benchmarks.load --scenarios browse shopper login-merge --users 200 --concurrency 16
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from .endpoints import MODES, get_revision
+from .utils import setup_django
+
+
+class Recorder:
+    """Thread safe collection of requests records"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def add(self, **record):
+        with self._lock:
+            self.records.append(record)
+
+
+class Shopper:
+    """Virtual user, which runs scenario by own client session"""
+
+    def __init__(self, recorder: Recorder, products: List[int], account=None, items: int = 5):
+        from django.test import Client
+
+        self.client = Client()
+        self.recorder = recorder
+        self.products = products
+        self.items = items
+        # Account is used for duplicate baskets check after login only
+        self.login_account = account
+        self.account = None
+        self.random = random.Random()
+
+    def call(self, endpoint: str, func: Callable, is_basket_request: bool = True):
+        """Measure call, basket of shopper is checked for duplicates after successful basket request"""
+        error = response = None
+        started_at = time.perf_counter()
+        try:
+            response = func()
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - started_at
+        is_duplicate = bool(is_basket_request and error is None and self.count_baskets() > 1)
+        self.recorder.add(endpoint=endpoint, latency=latency, error=error, is_duplicate=is_duplicate)
+        return response if error is None else None
+
+    def get(self, endpoint: str, path: str):
+        return self.call(endpoint, lambda: self.client.get(path))
+
+    def post(self, endpoint: str, path: str, data: dict = None):
+        return self.call(
+            endpoint, lambda: self.client.post(path, json.dumps(data or {}), content_type="application/json")
+        )
+
+    def add_item(self):
+        return self.post(
+            "POST create/items/",
+            "/api/basket/create/items/",
+            {"basket_items": [{"product": self.random.choice(self.products), "amount": 1}]},
+        )
+
+    def login(self):
+        def force_login():
+            self.client.force_login(self.login_account)
+            return self.client.get("/api/basket/amount/")
+
+        # Login cycles session key, basket is merged by following basket request
+        response = self.call("login + GET amount/", force_login)
+        self.account = self.login_account
+        return response
+
+    def count_baskets(self) -> int:
+        from django.conf import settings
+        from django.db.models import Q
+        from django_basket.models import get_basket_model
+
+        cookie = self.client.cookies.get(settings.SESSION_COOKIE_NAME)
+        lookup = Q(session_id=cookie.value) if cookie else Q(pk__in=[])
+        if self.account is not None:
+            lookup |= Q(user=self.account)
+        return get_basket_model().objects.filter(lookup).count()
+
+
+def browse(shopper: Shopper):
+    for _ in range(shopper.items):
+        shopper.get("GET receive/", "/api/basket/receive/")
+        shopper.get("GET amount/", "/api/basket/amount/")
+
+
+def shop(shopper: Shopper):
+    shopper.get("GET receive/", "/api/basket/receive/")
+    for _ in range(shopper.items):
+        shopper.add_item()
+    response = shopper.get("GET receive/", "/api/basket/receive/")
+    if response is not None and response.data["basket_items"]:
+        shopper.post("POST remove/", "/api/basket/remove/", {
+            "basket_items": [shopper.random.choice(response.data["basket_items"])["id"]]
+        })
+    shopper.get("GET amount/", "/api/basket/amount/")
+
+
+def login_merge(shopper: Shopper):
+    for _ in range(shopper.items):
+        shopper.add_item()
+    shopper.login()
+    shopper.get("GET receive/", "/api/basket/receive/")
+    shopper.add_item()
+    shopper.get("GET amount/", "/api/basket/amount/")
+
+
+SCENARIOS: Dict[str, Callable[[Shopper], None]] = {
+    "browse": browse,
+    "shopper": shop,
+    "login-merge": login_merge,
+}
+
+
+def begin_immediate(execute, sql, params, many, context):
+    # Write lock is taken on SQLite transaction start, so it's awaited with timeout,
+    # instead of failing on lock upgrade of deferred transaction
+    if sql == "BEGIN":
+        sql = "BEGIN IMMEDIATE"
+    return execute(sql, params, many, context)
+
+
+def install_begin_immediate(connection, **kwargs):
+    if connection.vendor == "sqlite" and begin_immediate not in connection.execute_wrappers:
+        connection.execute_wrappers.append(begin_immediate)
+
+
+def prepare_data(products_amount: int, accounts_amount: int):
+    from django.contrib.auth import get_user_model
+    from example_apps.products.models import Product
+
+    Product.objects.bulk_create([
+        Product(title=f"product{index}", price=index + 1) for index in range(products_amount)
+    ])
+    User = get_user_model()
+    User.objects.bulk_create([User(username=f"shopper{index}") for index in range(accounts_amount)])
+    return list(Product.objects.values_list("pk", flat=True)), list(User.objects.order_by("pk"))
+
+
+def run_scenario(name: str, users: int, concurrency: int, items: int, products: List[int], accounts: list):
+    from django.db import connection
+
+    recorder = Recorder()
+
+    def run_shopper(index: int):
+        try:
+            SCENARIOS[name](Shopper(recorder, products, accounts[index % len(accounts)], items))
+        finally:
+            # Every thread has own database connection
+            connection.close()
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_shopper, range(users)))
+    return recorder.records, time.perf_counter() - started_at
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """Nearest rank percentile of sorted values"""
+    return values[max(math.ceil(len(values) * rank / 100) - 1, 0)]
+
+
+def summarize(scenario: str, endpoint: str, records: List[dict], duration: float) -> dict:
+    latencies = sorted(record["latency"] * 1000 for record in records)
+    errors = [record for record in records if record["error"]]
+    succeeded = len(records) - len(errors)
+    return {
+        "scenario": scenario,
+        "endpoint": endpoint,
+        "requests": len(records),
+        "throughput_rps": round(len(records) / duration, 2),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "error_rate": round(len(errors) / len(records), 4),
+        "duplicate_rate": round(
+            sum(record["is_duplicate"] for record in records) / succeeded, 4
+        ) if succeeded else 0.0,
+        "errors": dict(Counter(record["error"] for record in errors)),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--mode", choices=list(MODES), default="static", help="Basket item mode")
+    parser.add_argument(
+        "--settings", help="Settings module with shared database, instead of temporary SQLite file of mode"
+    )
+    parser.add_argument("--users", type=int, default=200, help="Virtual shoppers per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrently running shoppers")
+    parser.add_argument("--items", type=int, default=5, help="Items added by shopper, reads of browsing shopper")
+    parser.add_argument(
+        "--accounts", type=int, help="Accounts of logging in shoppers, default is quarter of users"
+    )
+    parser.add_argument("--timeout", type=float, default=30, help="SQLite lock waiting timeout, in seconds")
+    parser.add_argument(
+        "--deferred-transactions", action="store_true",
+        help="Keep SQLite deferred transactions, which fail on concurrent lock upgrade without waiting",
+    )
+    parser.add_argument("--output", help="Path of JSON results file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.settings:
+            setup_django(args.settings)
+        else:
+            setup_django(
+                MODES[args.mode],
+                database=os.path.join(directory, "load.sqlite3"),
+                options={"timeout": args.timeout},
+            )
+        import django
+        from django.db import connection
+        from django.db.backends.signals import connection_created
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        if connection.vendor == "sqlite":
+            # Readers don't wait for writer, as with concurrent Postgres transactions
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            if not args.deferred_transactions:
+                connection_created.connect(install_begin_immediate)
+                install_begin_immediate(connection)
+        products, accounts = prepare_data(20, args.accounts or max(args.users // 4, 1))
+
+        rows = []
+        for scenario in args.scenarios:
+            records, duration = run_scenario(
+                scenario, args.users, args.concurrency, args.items, products, accounts
+            )
+            by_endpoint = defaultdict(list)
+            for record in records:
+                by_endpoint[record["endpoint"]].append(record)
+            rows.extend(
+                summarize(scenario, endpoint, endpoint_records, duration)
+                for endpoint, endpoint_records in by_endpoint.items()
+            )
+            rows.append(summarize(scenario, "total", records, duration))
+
+    print(f"{'scenario':<12}{'endpoint':<22}{'requests':>9}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'errors':>8}{'dups':>8}")
+    for row in rows:
+        print(f"{row['scenario']:<12}{row['endpoint']:<22}{row['requests']:>9}{row['throughput_rps']:>9.1f}"
+              f"{row['p50_ms']:>9.2f}{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}"
+              f"{row['error_rate']:>8.2%}{row['duplicate_rate']:>8.2%}")
+        for error, amount in row["errors"].items():
+            if row["endpoint"] == "total":
+                print(f"{'':<34}{amount:>9} {error}")
+    if args.output:
+        results = {
+            "revision": get_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "arguments": vars(args),
+            "results": rows,
+        }
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
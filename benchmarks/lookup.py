@@ -0,0 +1,103 @@
+"""
+    Basket lookup benchmark.
+
+    Fill file based SQLite database with millions of baskets and measure
+    baskets resolving query by session key and user, which is issued on every request.
+
+    Usage:
+        python -m benchmarks.lookup --rows 2000000 --lookups 1000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from .utils import setup_django
+
+BATCH_SIZE = 50000
+
+
+def fill_baskets(rows: int):
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django_basket.models import BaseBasket
+
+    User = get_user_model()
+    # Every tenth basket belongs to user, user has two baskets
+    User.objects.bulk_create(
+        [User(username=f"user{index}") for index in range(max(rows // 20, 1))],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.values_list("pk", flat=True))
+    table = connection.ops.quote_name(BaseBasket._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, rows, BATCH_SIZE):
+            cursor.executemany(
+                f"INSERT INTO {table} (created_at, updated_at, price, items_amount, version, session_id, user_id) "
+                f"VALUES (CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, 0, 0, 0, %s, %s)",
+                [
+                    (f"session{index}", user_ids[index % len(user_ids)] if index % 10 == 0 else None)
+                    for index in range(offset, min(offset + BATCH_SIZE, rows))
+                ]
+            )
+    return user_ids
+
+
+def get_lookup_queryset(lookups):
+    # The same query as `get_baskets` issues
+    from django_basket.models import BaseBasket
+    from django_basket.settings import basket_settings
+
+    querysets = [BaseBasket.objects.filter(**lookup) for lookup in lookups]
+    queryset = querysets[0].union(*querysets[1:]) if len(querysets) > 1 else querysets[0]
+    return queryset.order_by("pk")[:basket_settings.resolving_limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000000, help="Amount of baskets in table")
+    parser.add_argument("--lookups", type=int, default=1000, help="Amount of measured lookups")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django("benchmarks.settings", database=os.path.join(directory, "lookup.sqlite3"))
+        from django.db import connection
+        from django_basket.contrib.selectors import get_baskets
+
+        started_at = time.perf_counter()
+        user_ids = fill_baskets(args.rows)
+        print(f"Filled {args.rows} baskets in {time.perf_counter() - started_at:.1f} s")
+
+        timings = {"ORM lookup": [], "SQL execution": []}
+        for _ in range(args.lookups):
+            index = random.randrange(args.rows)
+            # Half of lookups are done for authenticated user with old session
+            lookups = [{"session_id": f"session{index}"}]
+            if index % 2:
+                lookups += [{"user_id": random.choice(user_ids)}, {"session_id": f"session{index + 1}"}]
+            started_at = time.perf_counter()
+            get_baskets(lookups)
+            timings["ORM lookup"].append(time.perf_counter() - started_at)
+            # Database execution without model instances building
+            sql, params = get_lookup_queryset(lookups).query.sql_with_params()
+            with connection.cursor() as cursor:
+                started_at = time.perf_counter()
+                cursor.execute(sql, params)
+                cursor.fetchall()
+                timings["SQL execution"].append(time.perf_counter() - started_at)
+
+        for name, values in timings.items():
+            values.sort()
+            print(f"{name}: median {statistics.median(values) * 1000:.3f} ms, "
+                  f"p95 {values[int(len(values) * 0.95) - 1] * 1000:.3f} ms, "
+                  f"max {values[-1] * 1000:.3f} ms")
+        print("Query plan:")
+        print(get_lookup_queryset([{"session_id": "session1"}, {"user_id": user_ids[0]}]).explain())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+    Startup benchmark of `django_basket`.
+
+    Measure `django_basket.rest.urls` import time in fresh interpreters
+    and check that no database connection is opened on import.
+
+    Usage:
+        python -m benchmarks.startup --repeat 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+DEFAULT_SETTINGS = "django_basket.tests.settings.settings"
+PROBE = """
+import json
+import os
+import time
+
+os.environ["DJANGO_SETTINGS_MODULE"] = {settings!r}
+
+from django.db import connections
+import django_basket.settings
+backends_on_settings_import = [alias for alias in connections if hasattr(connections._connections, alias)]
+
+import django
+setup_started_at = time.perf_counter()
+django.setup()
+setup_time = time.perf_counter() - setup_started_at
+
+import_started_at = time.perf_counter()
+import django_basket.rest.urls
+import_time = time.perf_counter() - import_started_at
+
+print(json.dumps({{
+    "backends_on_settings_import": backends_on_settings_import,
+    "setup_time": setup_time,
+    "import_time": import_time,
+    "opened_connections": [
+        alias for alias in connections if connections[alias].connection is not None
+    ],
+}}))
+"""
+
+
+def run_probe(settings: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(settings=settings)],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default=DEFAULT_SETTINGS, help="Django settings module")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreter runs")
+    args = parser.parse_args(argv)
+
+    results = [run_probe(args.settings) for _ in range(args.repeat)]
+    setup_times = [result["setup_time"] for result in results]
+    import_times = [result["import_time"] for result in results]
+    settings_backends = sorted({alias for result in results for alias in result["backends_on_settings_import"]})
+    opened_connections = sorted({alias for result in results for alias in result["opened_connections"]})
+
+    print(f"django.setup(): median {statistics.median(setup_times) * 1000:.2f} ms")
+    print(f"import django_basket.rest.urls: median {statistics.median(import_times) * 1000:.2f} ms, "
+          f"min {min(import_times) * 1000:.2f} ms, max {max(import_times) * 1000:.2f} ms")
+    if settings_backends:
+        print(f"Database backends loaded on `django_basket.settings` import: {', '.join(settings_backends)}")
+    if opened_connections:
+        print(f"Database connections opened on import: {', '.join(opened_connections)}")
+    if settings_backends or opened_connections:
+        return 1
+    print("No database connection is opened on import")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+def setup_django(settings: str, database: Optional[str] = None, options: Optional[dict] = None):
+    """Setup django with benchmark settings and create tables from models"""
+    os.environ["DJANGO_SETTINGS_MODULE"] = settings
+    import django
+    from django.conf import settings as django_settings
+
+    if database:
+        django_settings.DATABASES["default"]["NAME"] = database
+    if options:
+        django_settings.DATABASES["default"].setdefault("OPTIONS", {}).update(options)
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+
+@contextmanager
+def measure():
+    """Collect wall time and executed queries of context"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    result = {}
+    with CaptureQueriesContext(connection) as context:
+        started_at = time.perf_counter()
+        yield result
+        result["time"] = time.perf_counter() - started_at
+    result["queries"] = len(context.captured_queries)
@@ -1,7 +1,25 @@
 from django.apps import AppConfig
+from django.core.signals import setting_changed
 from django.utils.translation import ugettext_lazy as _
 
+from .settings import SETTINGS_BLOCK, basket_settings
+from .utils import hooks
+
+
+def reload_basket_settings(setting, **kwargs):
+    """Rebind basket settings and configured hooks, used by `override_settings` in tests"""
+    if setting == SETTINGS_BLOCK:
+        basket_settings.reload()
+        hooks.clear()
+
 
 class DjangoBasketConfig(AppConfig):
     name = 'django_basket'
     verbose_name = _('Basket')
+
+    def ready(self):
+        # Register all hooked functions and resolve configured callables once
+        from . import shortcuts  # noqa: F401
+
+        hooks.compile()
+        setting_changed.connect(reload_basket_settings)
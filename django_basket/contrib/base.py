@@ -1,7 +1,7 @@
 from typing import Union, Iterable, List
 from decimal import Decimal
 
-from django.db.models import Model
+from django.db.models import Model, QuerySet
 from django_basket.models import BaseBasket
 
 
@@ -20,5 +20,11 @@ class BaseBasketItemHelper(BasketHelper):
     def items_total_price(self) -> Union[int, float, Decimal]:
         raise NotImplemented
 
+    def queryset_total_price(self, queryset: QuerySet) -> Union[int, float, Decimal]:
+        raise NotImplemented
+
+    def items_price(self, items: Iterable[Model]) -> Union[int, float, Decimal]:
+        raise NotImplemented
+
     def items_create(self, validated_data: List) -> Iterable[Model]:
         raise NotImplemented
@@ -1,34 +1,124 @@
 from typing import *
 from decimal import Decimal
+from contextlib import contextmanager
 
-from django.db.models import Model
+from django.db import connections, router
+from django.db.models import Model, QuerySet, F
+from django.db.models.signals import pre_delete, post_delete, m2m_changed
+from django.db.transaction import atomic
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from django_basket.utils import settings_function
+from ..instrumentation import instrumented, aggregator_basket
+from ..exceptions import BasketVersionConflict
 from ..settings import basket_settings
 from ..models.item import DynamicBasketItem
 from .base import BasketHelper as DefaultBasketHelper
-from .item import basket_use_case_class
+from .item import get_basket_item_aggregator_class, calculate_items_amount, to_decimal
+from .cache import bump_basket_version
 
 
 User = get_user_model()
 
 
+class BasketMutationBatch:
+    """Queue of basket mutations, collected by `BasketAggregator.batch`"""
+
+    def __init__(self):
+        self.adding = []
+        self.removing = []
+        self.is_emptying = False
+
+    def add(self, items: List[Model]):
+        for item in items:
+            # Re-adding cancels queued removing
+            if item in self.removing:
+                self.removing.remove(item)
+            self.adding.append(item)
+
+    def remove(self, items: List[Model]):
+        for item in items:
+            # Removing cancels queued adding, item could be already contained in basket
+            if item in self.adding:
+                self.adding.remove(item)
+            if item not in self.removing:
+                self.removing.append(item)
+
+    def empty(self):
+        self.adding = []
+        self.removing = []
+        self.is_emptying = True
+
+
 class BasketAggregator(DefaultBasketHelper):
 
     def __init__(self, basket):
         super().__init__(basket)
-        self.items_aggregator = basket_use_case_class(basket)
+        self.items_aggregator = get_basket_item_aggregator_class()(basket)
+        self.mutation_batch: Optional[BasketMutationBatch] = None
+        # Retried compare-and-swap savings of current totals saving
+        self.version_conflicts = 0
+
+    @contextmanager
+    def batch(self):
+        """
+            Collect adding, removing and emptying inside context,
+            apply them at exit in one transaction with single price recalculation.
+            Adding inside batch returns queued items as they were passed.
+        """
+        if self.mutation_batch is not None:
+            # Nested batch, will be applied by outer one
+            yield self
+            return
+
+        self.mutation_batch = BasketMutationBatch()
+        try:
+            yield self
+            mutation_batch = self.mutation_batch
+        finally:
+            self.mutation_batch = None
+
+        with atomic():
+            if mutation_batch.is_emptying:
+                # Items which are added after emptying are kept instead of deleting
+                self._empty_items(keeping=mutation_batch.adding)
+            if mutation_batch.removing:
+                self._remove_items(mutation_batch.removing)
+            if mutation_batch.adding:
+                self.items_aggregator.items_adding(mutation_batch.adding)
+            self.calculate_price()
 
-    @settings_function(func_path=basket_settings.adding_function)
+    @instrumented("add_items", items=lambda result, aggregator, products: len(result), basket=aggregator_basket)
+    @settings_function(setting="adding_function")
     def add_items(self, products: List[Model]) -> List[Model]:
         """
             Implement adding item to basket,
             delegate adding process to basket item helper
             than recalculate total basket price
         """
+        if self.mutation_batch is not None:
+            self.mutation_batch.add(products)
+            return products
+
+        if not basket_settings.is_incremental_pricing:
+            adding_items = self.items_aggregator.items_adding(products)
+            self.calculate_price()
+            return adding_items
+
+        contained_price = 0
+        if not basket_settings.is_dynamic:
+            # Relation to repeated item is added once, so its price is added once
+            products = list({product.pk: product for product in products}.values())
+            # Adding of already contained item will not change basket
+            contained_price = self.items_aggregator.queryset_total_price(
+                self.basket.basket_items.filter(pk__in=[product.pk for product in products])
+            )
         adding_items = self.items_aggregator.items_adding(products)
-        self.calculate_price()
+        self.update_price(
+            to_decimal(self.items_aggregator.items_price(adding_items))
+            - to_decimal(contained_price)
+        )
         return adding_items
 
     def add(self, item: Model) -> Model:
@@ -39,6 +129,7 @@ class BasketAggregator(DefaultBasketHelper):
         """Add multiple basket item"""
         return self.add_items(items)
 
+    @instrumented("create_items", items=lambda result, aggregator, data: len(data), basket=aggregator_basket)
     def create_items(self, data: List[Dict]):
         """Create basket items and add it to available basket"""
         items, is_custom_function = self.items_aggregator.items_create(data)
@@ -51,44 +142,221 @@ class BasketAggregator(DefaultBasketHelper):
                 )
             raise e
 
-    @settings_function(func_path=basket_settings.price_calc_function)
+    @instrumented("calculate_price", basket=aggregator_basket)
+    @settings_function(setting="price_calc_function")
     def calculate_price(self):
         """Calculate and save total basket price"""
         self.basket.price = Decimal(
             self.items_aggregator.items_total_price()
         )
-        self.basket.save()
+        self.save_totals()
+
+    def save_totals(self):
+        """Save basket price, stored items amount and invalidate cached basket data"""
+        if basket_settings.is_optimistic_locking:
+            self._save_totals_versioned()
+            return
+
+        update_fields = ["price", "updated_at"]
+        if basket_settings.is_items_amount_stored:
+            self.basket.items_amount = calculate_items_amount(self.basket)
+            update_fields.append("items_amount")
+        self.basket.save(update_fields=update_fields)
+        bump_basket_version(self.basket.pk)
+
+    def _save_totals_versioned(self):
+        """
+            Save totals by compare-and-swap of basket version, without row locking.
+            If basket was saved concurrently, totals are recalculated from actual contents
+            and saving is retried, not more than `optimistic_locking_retries` times.
+        """
+        updates = {"price": self.basket.price, "updated_at": timezone.now(), "version": F("version") + 1}
+        if basket_settings.is_items_amount_stored:
+            self.basket.items_amount = calculate_items_amount(self.basket)
+            updates["items_amount"] = self.basket.items_amount
+        is_saved = (
+            self.basket.__class__._default_manager
+            .filter(pk=self.basket.pk, version=self.basket.version)
+            .update(**updates)
+        )
+        if is_saved:
+            self.basket.updated_at = updates["updated_at"]
+            self.basket.version += 1
+            bump_basket_version(self.basket.pk)
+            return
+
+        if self.version_conflicts >= basket_settings.optimistic_locking_retries:
+            raise BasketVersionConflict(f"Basket {self.basket.pk} is changed concurrently")
+        # Price calculation saves totals again, retries are counted by nesting
+        self.version_conflicts += 1
+        try:
+            self.basket.refresh_from_db(fields=["version"])
+            self.calculate_price()
+        finally:
+            self.version_conflicts -= 1
+
+    def update_price(self, delta: Union[int, float, Decimal]):
+        """Shift saved basket price by delta of changed items, without total recalculation"""
+        updates = {"price": F("price") + to_decimal(delta), "updated_at": timezone.now()}
+        if basket_settings.is_items_amount_stored:
+            updates["items_amount"] = calculate_items_amount(self.basket)
+        elif not delta:
+            return
+        if basket_settings.is_optimistic_locking:
+            # Shifting is atomic itself, version is changed for concurrent compare-and-swap savings
+            updates["version"] = F("version") + 1
+        self.basket.__class__._default_manager.filter(pk=self.basket.pk).update(**updates)
+        self.basket.refresh_from_db(fields=list(updates))
+        bump_basket_version(self.basket.pk)
 
-    @settings_function(func_path=basket_settings.empty_function)
+    def reconcile_price(self, is_fixing: bool = True) -> Decimal:
+        """
+            Compare saved basket price with total price of basket items.
+
+            Args:
+                is_fixing: bool - save actual total price if it differs from saved one
+            Return:
+                drift: Decimal - difference between actual and saved price
+        """
+        decimal_places = self.basket._meta.get_field("price").decimal_places
+        price = to_decimal(self.items_aggregator.items_total_price()).quantize(
+            Decimal(10) ** -decimal_places
+        )
+        drift = price - self.basket.price
+        if drift and is_fixing:
+            self.basket.price = price
+            self.save_totals()
+        return drift
+
+    def reconcile_items_amount(self, is_fixing: bool = True) -> int:
+        """
+            Compare stored basket items amount with actual one,
+            stored amount of baskets created before `is_items_amount_stored` enabling is zero.
+
+            Args:
+                is_fixing: bool - save actual items amount if it differs from stored one
+            Return:
+                drift: int - difference between actual and stored items amount
+        """
+        if not basket_settings.is_items_amount_stored:
+            return 0
+        drift = calculate_items_amount(self.basket) - self.basket.items_amount
+        if drift and is_fixing:
+            # Totals saving stores actual items amount
+            self.save_totals()
+        return drift
+
+    @instrumented("empty_basket", basket=aggregator_basket)
+    @settings_function(setting="empty_function")
     def empty_basket(self):
         """Delete all items from basket"""
+        if self.mutation_batch is not None:
+            self.mutation_batch.empty()
+            return
+
+        self._empty_items()
+        if basket_settings.is_incremental_pricing:
+            self.basket.price = Decimal(0)
+            self.save_totals()
+        else:
+            self.calculate_price()
+
+    def _empty_items(self, keeping: List[Model] = ()):
         if basket_settings.is_dynamic:
             # Delete dynamic products
-            self.basket.basket_items.all().delete()
+            self._delete_items(self.basket.basket_items.all())
+        elif basket_settings.is_delete_removing:
+            # Delete all related objects if enable delete while removing
+            self._delete_items(self.basket.basket_items.exclude(pk__in=[item.pk for item in keeping]))
         else:
-            # Will delete all related objects if enable delete while removing
             # Else clear basket items relations
-            if basket_settings.is_delete_removing:
-                self.basket.basket_items.all().delete()
-            else:
-                self.basket.basket_items.clear()
-        self.calculate_price()
+            self.basket.basket_items.clear()
 
-    @settings_function(func_path=basket_settings.remove_functions)
+    @instrumented("remove", items=lambda result, aggregator, items: len(items), basket=aggregator_basket)
+    @settings_function(setting="remove_functions")
     def remove(self, items: List[Model]):
         """Remove items from basket"""
+        if self.mutation_batch is not None:
+            self.mutation_batch.remove(items)
+            return
+
+        removing_price = 0
+        if basket_settings.is_incremental_pricing:
+            # Price of items which are contained in basket
+            removing_price = self.items_aggregator.queryset_total_price(
+                self.basket.basket_items.filter(pk__in=[item.pk for item in items])
+            )
+
+        self._remove_items(items)
+        if basket_settings.is_incremental_pricing:
+            self.update_price(-to_decimal(removing_price))
+        else:
+            self.calculate_price()
+
+    def _remove_items(self, items: List[Model]):
         if basket_settings.is_dynamic:
-            (
+            self._delete_items(
                 DynamicBasketItem.objects
                 .filter(
                     id__in=[item.id for item in items],
                     basket=self.basket
                 )
-                .delete()
             )
+        elif basket_settings.is_delete_removing and self._is_raw_deletable():
+            self._delete_items(
+                self.basket.basket_items.model._default_manager.filter(pk__in=[item.pk for item in items])
+            )
+            # Deleted instances lose primary key, as by `Model.delete`
+            for item in items:
+                item.pk = None
         else:
             self.basket.basket_items.remove(*items)
             if basket_settings.is_delete_removing:
+                # Items deleting with signals, cascades or custom `delete` method
                 list(map(lambda item: item.delete(), items))
 
-        self.calculate_price()
+    def _is_raw_deletable(self) -> bool:
+        """
+            Check that basket items could be deleted without collector:
+            there are no deletion signals receivers, custom `delete` method
+            and relations to items except basket items relation
+        """
+        field = self.basket._meta.get_field("basket_items")
+        model, through = field.related_model, field.remote_field.through
+        if model.delete is not Model.delete:
+            return False
+        if (
+            any(signal.has_listeners(sender) for signal in (pre_delete, post_delete) for sender in (model, through))
+            or m2m_changed.has_listeners(through)
+        ):
+            return False
+        for relation in model._meta.get_fields(include_hidden=True):
+            if not relation.is_relation or relation.concrete or relation.many_to_one:
+                continue
+            if relation.many_to_many and getattr(relation, "field", None) is field:
+                continue
+            if (relation.one_to_many or relation.one_to_one) and relation.related_model is through:
+                continue
+            return False
+        return True
+
+    def _delete_items(self, queryset: QuerySet):
+        """
+            Delete items by set-based statements, through table rows and items rows
+            are deleted by raw `DELETE ... WHERE id IN (...)` if it's possible
+        """
+        if not self._is_raw_deletable():
+            queryset.delete()
+            return
+
+        field = self.basket._meta.get_field("basket_items")
+        through = field.remote_field.through
+        using = router.db_for_write(queryset.model)
+        item_ids = list(queryset.values_list("pk", flat=True))
+        batch_size = max(connections[using].ops.bulk_batch_size(["pk"], item_ids), 1)
+        with atomic(using=using):
+            for offset in range(0, len(item_ids), batch_size):
+                ids = item_ids[offset:offset + batch_size]
+                # Relations to deleted items are deleted from all baskets, as cascade does
+                through._base_manager.filter(**{f"{field.m2m_reverse_field_name()}__in": ids})._raw_delete(using)
+                queryset.model._base_manager.filter(pk__in=ids)._raw_delete(using)
@@ -0,0 +1,88 @@
+import time
+from typing import Any, Optional
+
+from django.core.cache import caches
+from django.db import router, transaction
+
+from django_basket.settings import basket_settings
+from django_basket.models import get_basket_model
+
+
+__all__ = (
+    "BASKET_ID_SESSION_KEY",
+    "get_basket_version",
+    "bump_basket_version",
+    "get_basket_etag",
+    "get_cached_basket_data",
+    "set_cached_basket_data",
+)
+
+
+BASKET_ID_SESSION_KEY = "_basket_id"
+VERSION_KEY = "django_basket:version:{basket_id}"
+DATA_KEY = "django_basket:{name}:{basket_id}:{version}"
+
+
+def get_cache():
+    return caches[basket_settings.cache_alias]
+
+
+def get_basket_version(basket_id: int, is_creating: bool = False) -> Optional[int]:
+    """
+        Get basket data version, which is changed by every basket mutation.
+
+        Args:
+            basket_id: int - basket primary key
+            is_creating: bool - initialize version if it's missed
+        Return:
+            version: Optional[int] - current version, `None` if it's missed
+    """
+    key = VERSION_KEY.format(basket_id=basket_id)
+    version = get_cache().get(key)
+    if version is None and is_creating:
+        # Time based initial version will not repeat versions of evicted counter,
+        # nanoseconds are taken from float time, `time.time_ns()` requires Python 3.7
+        get_cache().add(key, int(time.time() * 10 ** 9), timeout=None)
+        version = get_cache().get(key)
+    return version
+
+
+def bump_basket_version(basket_id: int):
+    """
+        Invalidate all cached basket data, when current transaction is committed.
+        Concurrent reader of earlier version would cache not committed data by new version.
+    """
+    if not basket_settings.is_caching:
+        return
+    transaction.on_commit(
+        lambda: _increment_version(basket_id),
+        using=router.db_for_write(get_basket_model()),
+    )
+
+
+def _increment_version(basket_id: int):
+    try:
+        get_cache().incr(VERSION_KEY.format(basket_id=basket_id))
+    except ValueError:
+        # Version isn't initialized, so nothing is cached
+        pass
+
+
+def get_basket_etag(name: str, basket_id: int, version: int) -> str:
+    return f'"{name}-{basket_id}-{version}"'
+
+
+def get_cached_basket_data(name: str, basket_id: int, version: int) -> Optional[Any]:
+    return get_cache().get(
+        DATA_KEY.format(name=name, basket_id=basket_id, version=version)
+    )
+
+
+def set_cached_basket_data(name: str, basket_id: int, version: int, data: Any):
+    # Use cache backend timeout if it isn't configured
+    extra = {} if basket_settings.cache_timeout is None else {"timeout": basket_settings.cache_timeout}
+    get_cache().set(
+        DATA_KEY.format(name=name, basket_id=basket_id, version=version),
+        data,
+        **extra
+    )
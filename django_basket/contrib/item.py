@@ -1,10 +1,12 @@
 from typing import Union, Iterable, Type, List, Tuple
 from decimal import Decimal
 
-from django.db.models import Sum, Model
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Sum, Model, QuerySet, Subquery, OuterRef
 from django.db.models.functions import Coalesce
+from django.contrib.contenttypes.models import ContentType
 
-from django_basket.utils import load_module
+from django_basket.utils import load_module, lazy_module, lazy_module_attributes, settings_function
 from ..settings import basket_settings
 from ..models.item import DynamicBasketItem as DynamicBasketItemModel
 from .base import BaseBasketItemHelper
@@ -19,10 +21,17 @@ class BasketItemAggregator(BaseBasketItemHelper):
 
     def items_total_price(self) -> Union[int, float, Decimal]:
         """Calculate sum of products prices"""
-        res = self.basket.basket_items.all().aggregate(
+        return self.queryset_total_price(self.basket.basket_items.all())
+
+    def queryset_total_price(self, queryset: QuerySet) -> Union[int, float, Decimal]:
+        """Calculate sum of basket items queryset prices"""
+        return queryset.aggregate(
             total_price=Coalesce(Sum(basket_settings.price_field_name), 0)
         ).get("total_price")
-        return res
+
+    def items_price(self, items: Iterable[Model]) -> Union[int, float, Decimal]:
+        """Calculate sum of prices of given items, without database aggregation"""
+        return sum([getattr(item, basket_settings.price_field_name) for item in items])
 
     def items_create(self, validated_data: List) -> Tuple[List[Model], bool]:
         """Create basket items, use only custom implementation"""
@@ -40,15 +49,76 @@ class DynamicBasketItemAggregator(BasketItemAggregator):
         products = DynamicBasketItemModel.create_item(items)
         return super().items_adding(products)
 
-    def items_total_price(self) -> Union[int, float, Decimal]:
-        """Calculate sum of products prices"""
+    def items_price(self, items: Iterable[DynamicBasketItemModel]) -> Union[int, float, Decimal]:
+        """Calculate sum of prices of given dynamic items"""
         return sum([
-            getattr(item, basket_settings.price_field_name)
-            for item in self.basket.basket_items.all()
+            to_decimal(item.price)
+            for item in DynamicBasketItemModel.load_content_objects(items)
         ])
 
+    def queryset_total_price(self, queryset: QuerySet) -> Union[int, float, Decimal]:
+        """
+            Calculate sum of dynamic items prices in database,
+            one aggregate query per content type joined on `object_id`.
+            Prices of models without price column (property etc.) are summed in python.
+        """
+        total_price = Decimal(0)
+        python_priced_types = []
+        content_type_ids = (
+            queryset
+            .order_by()
+            .values_list("content_type_id", flat=True)
+            .distinct()
+        )
+        for content_type_id in content_type_ids:
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if not has_price_column(model):
+                python_priced_types.append(content_type_id)
+                continue
+            content_type_price = queryset.filter(content_type_id=content_type_id).aggregate(
+                total_price=Sum(Subquery(
+                    model._base_manager
+                    .filter(pk=OuterRef("object_id"))
+                    .values(basket_settings.price_field_name)[:1]
+                ))
+            ).get("total_price")
+            total_price += to_decimal(content_type_price or 0)
+
+        if python_priced_types:
+            items = DynamicBasketItemModel.load_content_objects(
+                queryset.filter(content_type_id__in=python_priced_types)
+            )
+            total_price += sum([to_decimal(item.price) for item in items])
+        return total_price
+
+
+@settings_function(setting="basket_items_amount")
+def calculate_items_amount(basket) -> int:
+    """Calculate amount of basket items"""
+    return basket.basket_items.count()
+
+
+def has_price_column(model: Type[Model]) -> bool:
+    """Check is model price stored in database column"""
+    try:
+        field = model._meta.get_field(basket_settings.price_field_name)
+    except FieldDoesNotExist:
+        return False
+    return field.concrete
+
+
+def to_decimal(value: Union[int, float, Decimal]) -> Decimal:
+    """Convert price to decimal without float representation error"""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+@lazy_module
+def get_basket_item_aggregator_class() -> Type[BaseBasketItemHelper]:
+    return load_module(
+        basket_settings.basket_item_aggregator,
+        default=DynamicBasketItemAggregator if basket_settings.is_dynamic else BasketItemAggregator,
+    )
+
 
-basket_use_case_class = load_module(
-    basket_settings.basket_item_aggregator,
-    default=DynamicBasketItemAggregator if basket_settings.is_dynamic else BasketItemAggregator,
-)
+# Backward compatibility of previously import time loaded aggregator class
+lazy_module_attributes(__name__, {"basket_use_case_class": get_basket_item_aggregator_class})
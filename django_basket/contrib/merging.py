@@ -1,25 +1,82 @@
-from typing import Iterable, Optional
+from typing import Iterable, Optional, List
 
+from django.db.models import Min
 from django.db.transaction import atomic
 from django_basket.contrib.basket import BasketAggregator
 from django_basket.utils import settings_function
+from django_basket.instrumentation import instrumented, returned_basket
 from django_basket.models import BaseBasket as BasketModel
 from django_basket.settings import basket_settings
+from .cache import bump_basket_version
 
 
-__all__ = ("merge", "merge_baskets_queryset")
+__all__ = ("merge", "merge_baskets", "merge_baskets_queryset")
 
 
-@settings_function(func_path=basket_settings.merging)
+def _move_items(basket: BasketModel, proxies: List[BasketModel]):
+    """
+        Move basket items relations from proxy baskets to basket by set-based statements,
+        items which are already contained in basket or repeated in proxies are skipped
+    """
+    field = basket._meta.get_field("basket_items")
+    through = field.remote_field.through._default_manager
+    basket_field, item_field = field.m2m_field_name(), field.m2m_reverse_field_name()
+    contained_items = through.filter(**{basket_field: basket.pk}).values(item_field)
+    moving_relations = list(
+        through
+        .filter(**{f"{basket_field}__in": [proxy.pk for proxy in proxies]})
+        .exclude(**{f"{item_field}__in": contained_items})
+        .order_by()
+        .values(item_field)
+        .annotate(relation_id=Min("pk"))
+        .values_list("relation_id", flat=True)
+    )
+    if moving_relations:
+        through.filter(pk__in=moving_relations).update(**{basket_field: basket.pk})
+
+
+@settings_function(setting="merging")
 def _merge(basket, proxy):
-    helper = BasketAggregator(basket)
-    # Add new objects from proxy basket
-    helper.add_many(list(proxy.basket_items.all()))
+    _move_items(basket, [proxy])
     # Recalculate basket total price
-    helper.calculate_price()
+    BasketAggregator(basket).calculate_price()
     proxy.delete()
 
 
+@instrumented("merge", basket=returned_basket)
+def merge_baskets(basket: BasketModel, proxies: Iterable[BasketModel], **kwargs) -> BasketModel:
+    """
+        Merge collection of baskets in one,
+        with single price recalculation and proxy baskets deleting.
+
+        Args:
+            basket: BasketModel - core basket
+            proxies: Iterable[BasketModel] - proxy baskets, all contained items will merged in core basket
+            kwargs: - additional basket fields which will added after merging
+        Return:
+            basket: BasketModel - result basket object
+    """
+    proxies = [proxy for proxy in proxies if proxy.pk != basket.pk]
+    proxy_ids = [proxy.pk for proxy in proxies]
+    with atomic():
+        if basket_settings.merging:
+            # Custom merging function works with pair of baskets
+            for proxy in proxies:
+                _merge(basket, proxy)
+        elif proxies:
+            _move_items(basket, proxies)
+            basket.__class__._default_manager.filter(pk__in=proxy_ids).delete()
+            BasketAggregator(basket).calculate_price()
+        # Save extra data in basket, stale version of full saving would win compare-and-swap
+        if kwargs:
+            for key, value in kwargs.items():
+                setattr(basket, key, value)
+            basket.save(update_fields=list({*kwargs, "updated_at"}))
+    for basket_id in [basket.pk, *proxy_ids]:
+        bump_basket_version(basket_id)
+    return basket
+
+
 def merge(basket: BasketModel, proxy: BasketModel, **kwargs):
     """
         Merge two baskets in one.
@@ -31,13 +88,7 @@ def merge(basket: BasketModel, proxy: BasketModel, **kwargs):
         Return:
             basket: BasketModel - result basket object
     """
-    with atomic():
-        _merge(basket, proxy)
-        # Save extra data in basket
-        for key, value in kwargs.items():
-            setattr(basket, key, value)
-        basket.save()
-    return basket
+    return merge_baskets(basket, [proxy], **kwargs)
 
 
 def merge_baskets_queryset(baskets: Iterable, general: Optional[BasketModel] = None):
@@ -53,7 +104,4 @@ def merge_baskets_queryset(baskets: Iterable, general: Optional[BasketModel] = N
     iterated = iter(baskets)
     if general is None:
         general = next(iterated)
-
-    for proxy_basket in iterated:
-        merge(general, proxy_basket)
-    return general
+    return merge_baskets(general, iterated)
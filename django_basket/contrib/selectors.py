@@ -1,23 +1,24 @@
 from typing import *
-from operator import or_
-from functools import reduce
 
-from django.db.models import Q
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.db.transaction import atomic
 
-from .merging import merge, merge_baskets_queryset
+from .merging import merge_baskets_queryset
 from django_basket.settings import basket_settings
 from django_basket.models.basket import BaseBasket as BasketModel
 from django_basket.utils import settings_function
+from django_basket.instrumentation import instrumented, returned_basket
 
 
-__all__ = ("get_empty_basket", "get_session_basket")
+__all__ = ("get_empty_basket", "get_or_create_session_basket", "get_virtual_basket", "get_session_basket")
 
 
 User = get_user_model()
 
 
-@settings_function(func_path=basket_settings.create_empty_basket_function)
+@instrumented("get_empty_basket", basket=returned_basket)
+@settings_function(setting="create_empty_basket_function")
 def get_empty_basket(user: User = None, **kwargs) -> BasketModel:
     return BasketModel.objects.create(
         user=user,
@@ -26,24 +27,59 @@ def get_empty_basket(user: User = None, **kwargs) -> BasketModel:
     )
 
 
+@instrumented("get_or_create_session_basket", basket=returned_basket)
+def get_or_create_session_basket(session_key: str, user: User = None) -> BasketModel:
+    """
+        Create basket for session, idempotent under concurrency:
+        if concurrent request has created session basket, it's returned instead.
+    """
+    try:
+        with atomic():
+            return get_empty_basket(session_id=session_key, user=user)
+    except IntegrityError:
+        # Session key is unique, concurrent request won creation
+        basket = BasketModel.objects.filter(session_id=session_key).first()
+        if basket is None:
+            raise
+        return basket
+
+
+def get_virtual_basket(user: User = None, **kwargs) -> BasketModel:
+    """Get unsaved empty basket, which is used for reading only"""
+    return BasketModel(user=user, price=0, **kwargs)
+
+
+@instrumented("get_baskets")
+def get_baskets(lookups: List[Dict[str, Any]]) -> List[BasketModel]:
+    """
+        Receive baskets matched by any of lookups by single query.
+        Lookups are united by `UNION` instead of `OR`, so every lookup uses own index.
+
+        Args:
+            lookups: List[Dict[str, Any]] - basket fields lookups
+        Return:
+            baskets: List[BasketModel] - ordered by primary key, not more than `basket_resolving_limit`
+    """
+    querysets = [BasketModel.objects.filter(**lookup) for lookup in lookups]
+    queryset = querysets[0].union(*querysets[1:]) if len(querysets) > 1 else querysets[0]
+    return list(queryset.order_by("pk")[:basket_settings.resolving_limit])
+
+
+@instrumented("get_basket", basket=returned_basket)
 def get_basket(**kwargs) -> Optional[BasketModel]:
-    # Generate filters to search baskets
-    filters = reduce(or_, [
-        Q(**{key: value})
-        for key, value in kwargs.items()
-    ])
-    qs = BasketModel.objects.filter(filters)
+    baskets = get_baskets([{key: value} for key, value in kwargs.items()])
     # If more than one basket - merge
-    if qs.count() > 1:
-        return merge_baskets_queryset(qs)
-    basket = qs.first()
-    return basket
+    if len(baskets) > 1:
+        return merge_baskets_queryset(baskets)
+    return baskets[0] if baskets else None
 
 
+@instrumented("get_session_keys_basket", basket=lambda result, *args, **kwargs: result[0])
 def get_session_keys_basket(
     current_session_key: str,
     old_session_key: str = None,
     user: User = None,
+    is_creating: bool = True,
 ) -> [BasketModel, bool]:
     """
         Get actual basket by sessions keys.
@@ -52,33 +88,54 @@ def get_session_keys_basket(
              current_session_key: str - Actual session key
              old_session_key: Optional[str] - Old session key, not required
              user: Optional[User] - Current authenticated user, be careful with anonymous user
+             is_creating: bool - create missed basket, else unsaved virtual basket will be returned
         Return:
             current basket: Basket - current basket
             is merged: bool - marker, is current basket merged with another, old session basket
     """
     if user and not user.is_authenticated:
         user = None
-    old_basket: Optional[BasketModel] = get_basket(session_id=old_session_key) if old_session_key else None
-    current_basket: Optional[BasketModel] = get_basket(session_id=current_session_key, user=user)
-    if not current_basket:
-        current_basket: BasketModel = get_empty_basket(
-            session_id=current_session_key, user=user
-        )
-    if old_basket and basket_settings.is_merging_on_login:
-        return merge(current_basket, old_basket), True
+    # Receive current and old session baskets by single query
+    lookups = [{"session_id": current_session_key}]
+    if user:
+        lookups.append({"user": user})
+    if old_session_key:
+        lookups.append({"session_id": old_session_key})
+    baskets = get_baskets(lookups)
+    current_baskets, old_baskets = [], []
+    for basket in baskets:
+        if basket.session_id == current_session_key or (user and basket.user_id == user.pk):
+            current_baskets.append(basket)
+        else:
+            old_baskets.append(basket)
+
+    is_merging = bool(old_baskets) and basket_settings.is_merging_on_login
+    if not current_baskets and not (is_creating or is_merging):
+        return get_virtual_basket(session_id=current_session_key, user=user), False
+    if not current_baskets:
+        current_basket: BasketModel = get_or_create_session_basket(current_session_key, user)
+    elif len(current_baskets) > 1:
+        current_basket: BasketModel = merge_baskets_queryset(current_baskets)
+    else:
+        current_basket: BasketModel = current_baskets[0]
+
+    if is_merging:
+        return merge_baskets_queryset(old_baskets, current_basket), True
     return current_basket, False
 
 
-def get_session_basket(session, user: Optional[User] = None):
+@instrumented("get_session_basket", basket=returned_basket)
+def get_session_basket(session, user: Optional[User] = None, is_creating: bool = True):
     """
         Get basket by session and authenticated user.
 
         Args:
             session: SessionStore - session store class.
             user: User - current authenticated user
+            is_creating: bool - create missed basket, else unsaved virtual basket will be returned
     """
     basket, is_merged = get_session_keys_basket(
-        session.session_key, session.get_marker(), user
+        session.session_key, session.get_marker(), user, is_creating
     )
     if is_merged:
         session.delete_marker()
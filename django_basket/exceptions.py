@@ -0,0 +1,2 @@
+class BasketVersionConflict(Exception):
+    """Basket totals saving lost compare-and-swap of basket version more times than allowed"""
@@ -0,0 +1,201 @@
+import logging
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from django.db import connections
+from django.dispatch import Signal
+
+from .settings import basket_settings
+from .tracing import start_span, finish_span
+from .utils import lazy_module, load_module
+
+
+__all__ = (
+    "OperationMeasurement",
+    "MetricsRegistry",
+    "operation_measured",
+    "metrics",
+    "instrumented",
+    "aggregator_basket",
+    "returned_basket",
+    "signal_sink",
+    "logging_sink",
+    "registry_sink",
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Sent with `measurement` argument for every measured operation, sender is operation name
+operation_measured = Signal()
+
+
+class OperationMeasurement(NamedTuple):
+    operation: str
+    # Wall time in seconds
+    duration: float
+    # Amount of queries executed by all database connections
+    queries: int
+    # Amount of processed basket items, `None` if operation doesn't receive items
+    items: Optional[int]
+
+
+class MetricsRegistry:
+    """In-process registry of operations measurements, aggregated in Prometheus style"""
+
+    buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+    def __init__(self):
+        self._lock = Lock()
+        self._operations: Dict[str, dict] = {}
+
+    def record(self, measurement: OperationMeasurement):
+        with self._lock:
+            operation = self._operations.setdefault(measurement.operation, {
+                "count": 0,
+                "duration": 0.0,
+                "queries": 0,
+                "items": 0,
+                "buckets": [0] * len(self.buckets),
+            })
+            operation["count"] += 1
+            operation["duration"] += measurement.duration
+            operation["queries"] += measurement.queries
+            operation["items"] += measurement.items or 0
+            operation["buckets"][bisect_left(self.buckets, measurement.duration)] += 1
+
+    def collect(self) -> Dict[str, dict]:
+        """Get copy of aggregated measurements by operation name, buckets are not cumulative"""
+        with self._lock:
+            return {
+                name: {**operation, "buckets": list(operation["buckets"])}
+                for name, operation in self._operations.items()
+            }
+
+    def render(self) -> str:
+        """Render aggregated measurements in Prometheus text exposition format"""
+        lines = []
+        for name, operation in sorted(self.collect().items()):
+            label = f'operation="{name}"'
+            cumulative = 0
+            for bound, amount in zip(self.buckets, operation["buckets"]):
+                cumulative += amount
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'django_basket_operation_duration_seconds_bucket{{{label},le="{le}"}} {cumulative}')
+            lines.extend([
+                f"django_basket_operation_duration_seconds_sum{{{label}}} {operation['duration']}",
+                f"django_basket_operation_duration_seconds_count{{{label}}} {operation['count']}",
+                f"django_basket_operation_queries_total{{{label}}} {operation['queries']}",
+                f"django_basket_operation_items_total{{{label}}} {operation['items']}",
+            ])
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+
+metrics = MetricsRegistry()
+
+
+def signal_sink(measurement: OperationMeasurement):
+    operation_measured.send(sender=measurement.operation, measurement=measurement)
+
+
+def logging_sink(measurement: OperationMeasurement):
+    logger.info(
+        "Basket %s: %.3f ms, %s queries, %s items",
+        measurement.operation,
+        measurement.duration * 1000,
+        measurement.queries,
+        measurement.items,
+        extra={"basket_measurement": measurement._asdict()},
+    )
+
+
+def registry_sink(measurement: OperationMeasurement):
+    metrics.record(measurement)
+
+
+@lazy_module
+def get_sinks() -> List[Callable[[OperationMeasurement], None]]:
+    return [load_module(path) for path in basket_settings.instrumentation_sinks or ()]
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def aggregator_basket(result, aggregator, *args, **kwargs):
+    return aggregator.basket
+
+
+def returned_basket(result, *args, **kwargs):
+    return result
+
+
+def _measure(operation: str, items: Optional[Callable], basket: Optional[Callable], func: Callable, args, kwargs):
+    counter = QueryCounter()
+    span = start_span(operation) if basket_settings.is_tracing else None
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            duration = time.perf_counter() - start
+    except Exception as e:
+        if span is not None:
+            finish_span(span, {"db.queries": counter.count, "error": type(e).__name__})
+        raise
+    items_amount = items(result, *args, **kwargs) if items else None
+    if span is not None:
+        measured_basket = basket(result, *args, **kwargs) if basket else None
+        finish_span(span, {
+            "basket.id": getattr(measured_basket, "pk", None),
+            "basket.items": items_amount,
+            "db.queries": counter.count,
+        })
+    if basket_settings.is_instrumentation:
+        measurement = OperationMeasurement(
+            operation=operation,
+            duration=duration,
+            queries=counter.count,
+            items=items_amount,
+        )
+        for sink in get_sinks():
+            sink(measurement)
+    return result
+
+
+def instrumented(operation: str, items: Callable[..., Optional[int]] = None, basket: Callable[..., Any] = None):
+    """
+        Measure wall time, queries amount and items amount of decorated function
+        and emit measurement to configured sinks, if instrumentation is enabled.
+        Nested measured operations are included in outer operation measurement.
+        Operation is traced by span nested in current one, if tracing is enabled.
+
+        Args:
+            operation: str - operation name
+            items: Optional[Callable] - receive items amount from function result and arguments
+            basket: Optional[Callable] - receive processed basket from function result and arguments,
+                its primary key is span attribute
+    """
+    def wrapper(func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            if not (basket_settings.is_instrumentation or basket_settings.is_tracing):
+                return func(*args, **kwargs)
+            return _measure(operation, items, basket, func, args, kwargs)
+        return wrapped
+    return wrapper
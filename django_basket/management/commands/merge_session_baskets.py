@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from django_basket.contrib.merging import merge_baskets_queryset
+from django_basket.models import get_basket_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge baskets which share session key into one, "
+        "run it before migration which makes basket session key unique"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report duplicated sessions, without merging",
+        )
+
+    def handle(self, *args, **options):
+        baskets = get_basket_model().objects.exclude(session_id=None)
+        session_ids = list(
+            baskets
+            .order_by()
+            .values("session_id")
+            .annotate(baskets_amount=Count("pk"))
+            .filter(baskets_amount__gt=1)
+            .values_list("session_id", "baskets_amount")
+        )
+        merged = 0
+        for session_id, baskets_amount in session_ids:
+            self.stdout.write(f"Session {session_id}: {baskets_amount} baskets")
+            if not options["dry_run"]:
+                # User basket is kept, otherwise the oldest one
+                merge_baskets_queryset(baskets.filter(session_id=session_id).order_by(
+                    F("user_id").asc(nulls_last=True), "pk"
+                ))
+            merged += 1
+        self.stdout.write(self.style.SUCCESS(f"Duplicated sessions: {merged}"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from django_basket.contrib.basket import BasketAggregator
+from django_basket.models import get_basket_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare saved basket prices and stored items amounts with basket items "
+        "and fix drifted ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted baskets, without fixing",
+        )
+
+    def handle(self, *args, **options):
+        drifted = 0
+        for basket in get_basket_model().objects.iterator():
+            aggregator = BasketAggregator(basket)
+            # Items amount is reconciled first, price fixing stores actual amount too
+            amount_drift = aggregator.reconcile_items_amount(is_fixing=not options["dry_run"])
+            drift = aggregator.reconcile_price(is_fixing=not options["dry_run"])
+            if amount_drift:
+                self.stdout.write(f"Basket {basket.pk}: items amount drift {amount_drift}")
+            if drift:
+                self.stdout.write(f"Basket {basket.pk}: price drift {drift}")
+            if drift or amount_drift:
+                drifted += 1
+        self.stdout.write(self.style.SUCCESS(f"Drifted baskets: {drifted}"))
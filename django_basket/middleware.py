@@ -0,0 +1,15 @@
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .shortcuts import get_basket_from_request
+
+
+class BasketMiddleware(MiddlewareMixin):
+    """
+        Attach basket to request as `request.basket`.
+        Basket is resolved on first access and only once per request.
+        Must be placed after session and authentication middlewares.
+    """
+
+    def process_request(self, request):
+        request.basket = SimpleLazyObject(lambda: get_basket_from_request(request))
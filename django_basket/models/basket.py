@@ -6,10 +6,11 @@ from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
 
 from ..settings import basket_settings
-from ..utils import load_module
+from ..utils import load_module, lazy_module
 from .item import get_basket_item_model
 
 
+@lazy_module
 def get_basket_model() -> Type["BaseBasket"]:
     return load_module(
         path=basket_settings.basket_model,
@@ -45,13 +46,27 @@ class BaseBasket(models.Model):
         decimal_places=2,
         default=Decimal(0)
     )
+    items_amount = models.PositiveIntegerField(
+        verbose_name=_("Items amount"),
+        default=0
+    )
+    version = models.PositiveIntegerField(
+        verbose_name=_("Version"),
+        default=0
+    )
     session_id = models.CharField(
         verbose_name=_('Session id'),
         max_length=255,
         null=True,
-        blank=True
+        blank=True,
+        # Single basket per session, concurrent creation falls back to created one
+        unique=True
     )
 
     class Meta:
         verbose_name = _("Basket")
-        verbose_name_plural = _("Baskets")
\ No newline at end of file
+        verbose_name_plural = _("Baskets")
+        indexes = [
+            # User baskets lookup, ordered by last update
+            models.Index(fields=["user", "updated_at"], name="basket_user_updated_at_idx"),
+        ]
\ No newline at end of file
@@ -1,8 +1,10 @@
-from typing import Union, List, Type
+from typing import Union, List, Type, Iterable, Dict, Tuple
 from decimal import Decimal
+from collections import defaultdict
 
 from django.core.exceptions import ImproperlyConfigured
-from django.db import models
+from django.db import models, connections, router
+from django.db.transaction import atomic
 from django.utils.translation import ugettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -30,32 +32,132 @@ class DynamicBasketItem(models.Model):
             basket_settings.price_field_name  # `price` by default
         )
 
-    # TODO: Re-factor
     @classmethod
-    def create_item(cls, objs) -> List["DynamicBasketItem"]:
-        """Create products and return in collection"""
-        if basket_settings.is_postgres:
-            # postgres db backend after bulk creation
-            # return objects with auto incremented primary field
-            return cls.objects.bulk_create([
-                cls(
-                    content_type=ContentType.objects.get_for_model(obj),
-                    object_id=obj.id,
-                ) for obj in objs
-            ])
+    def load_content_objects(cls, items: Iterable["DynamicBasketItem"]) -> List["DynamicBasketItem"]:
+        """
+            Resolve generic relations of items,
+            use one `in_bulk` query per content type instead of query per item
+        """
+        items = list(items)
+        object_ids = defaultdict(set)
+        for item in items:
+            if not cls.content_object.is_cached(item):
+                object_ids[item.content_type_id].add(item.object_id)
 
+        content_objects = {
+            content_type_id: (
+                ContentType.objects
+                .get_for_id(content_type_id)
+                .model_class()
+                ._base_manager
+                .in_bulk(ids)
+            )
+            for content_type_id, ids in object_ids.items()
+        }
+        for item in items:
+            content_object = content_objects.get(item.content_type_id, {}).get(item.object_id)
+            if content_object is not None:
+                cls.content_object.set_cached_value(item, content_object)
+        return items
+
+    @classmethod
+    def create_item(cls, objs: Iterable[models.Model]) -> List["DynamicBasketItem"]:
+        """
+            Create products and return in collection.
+            Products are inserted by one bulk query, primary keys are returned by insertion
+            if database backend supports it, otherwise they are re-selected on SQLite
+            or taken from consecutive `LAST_INSERT_ID()` range on MySQL.
+            Other backends insert products one by one.
+        """
+        objs = list(objs)
+        if not objs:
+            return []
+        # Resolve content type once per distinct model
+        content_types = ContentType.objects.get_for_models(*{obj.__class__ for obj in objs})
         products = []
         for obj in objs:
-            product = cls(
-                content_type=ContentType.objects.get_for_model(obj),
-                object_id=obj.id,
-            )
-            product.save()
+            product = cls(content_type=content_types[obj.__class__], object_id=obj.pk)
+            cls.content_object.set_cached_value(product, obj)
             products.append(product)
 
+        connection = connections[router.db_for_write(cls)]
+        # Flag is named `can_return_ids_from_bulk_insert` before Django 3.0
+        can_return_rows = getattr(
+            connection.features,
+            "can_return_rows_from_bulk_insert",
+            getattr(connection.features, "can_return_ids_from_bulk_insert", False),
+        )
+        if can_return_rows:
+            return cls.objects.bulk_create(products)
+        with atomic(using=connection.alias):
+            if connection.vendor == "sqlite":
+                return cls._bulk_create_reselecting(products, connection)
+            if connection.vendor == "mysql" and get_autoinc_lock_mode(connection) < 2:
+                return cls._bulk_create_last_insert_id(products, connection)
+            # Primary keys of bulk inserted rows are unknown, products are saved one by one
+            for product in products:
+                product.save(using=connection.alias)
+        return products
+
+    @classmethod
+    def _bulk_create_reselecting(
+        cls, products: List["DynamicBasketItem"], connection
+    ) -> List["DynamicBasketItem"]:
+        """
+            SQLite has single writer, write lock is held by transaction from insertion to commit,
+            so the last rows of table are inserted products
+        """
+        cls.objects.bulk_create(products)
+        created = (
+            cls.objects
+            .using(connection.alias)
+            .order_by("-pk")
+            .values_list("pk", flat=True)[:len(products)]
+        )
+        for product, pk in zip(products, reversed(created)):
+            product.pk = pk
+        return products
+
+    @classmethod
+    def _bulk_create_last_insert_id(
+        cls, products: List["DynamicBasketItem"], connection
+    ) -> List["DynamicBasketItem"]:
+        """
+            MySQL assigns consecutive primary keys to rows of single insertion statement
+            with `traditional` and `consecutive` auto increment lock modes,
+            `LAST_INSERT_ID()` returns primary key of the first row
+        """
+        fields = [field for field in cls._meta.concrete_fields if not field.primary_key]
+        batch_size = max(connection.ops.bulk_batch_size(fields, products), 1)
+        for start in range(0, len(products), batch_size):
+            batch = products[start:start + batch_size]
+            cls.objects.bulk_create(batch, batch_size=len(batch))
+            first_pk, increment = get_last_insert_id(connection)
+            for index, product in enumerate(batch):
+                product.pk = first_pk + index * increment
         return products
 
 
+# MySQL auto increment lock modes by database alias, mode is changed by server restart only
+_autoinc_lock_modes: Dict[str, int] = {}
+
+
+def get_autoinc_lock_mode(connection) -> int:
+    if connection.alias not in _autoinc_lock_modes:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT @@innodb_autoinc_lock_mode")
+            _autoinc_lock_modes[connection.alias] = int(cursor.fetchone()[0])
+    return _autoinc_lock_modes[connection.alias]
+
+
+def get_last_insert_id(connection) -> Tuple[int, int]:
+    """Get primary key of the first row inserted by last statement and auto increment step"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT LAST_INSERT_ID(), @@auto_increment_increment")
+        first_pk, increment = cursor.fetchone()
+    return int(first_pk), int(increment)
+
+
 def get_basket_item_model() -> Type[Union[DynamicBasketItem, models.Model]]:
     if basket_settings.is_dynamic:
         return DynamicBasketItem
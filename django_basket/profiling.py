@@ -0,0 +1,158 @@
+import cProfile
+import contextlib
+import io
+import logging
+import os
+import pstats
+import random
+import secrets
+import sys
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+
+import django
+import rest_framework
+from django.db import connections
+
+from .settings import basket_settings
+from .shortcuts import get_basket_items_amount
+
+
+__all__ = ("RequestProfiler", "start_profiler", "get_sampled_profiler", "get_threshold_profiler")
+
+
+logger = logging.getLogger(__name__)
+
+# Frames of these packages and modules are skipped while query call site is searched
+SKIPPED_PATHS = (
+    os.path.dirname(django.__file__) + os.sep,
+    os.path.dirname(rest_framework.__file__) + os.sep,
+    os.path.splitext(contextlib.__file__)[0],
+    os.path.splitext(__file__)[0],
+    os.path.join(os.path.dirname(__file__), "instrumentation"),
+)
+
+
+class RequestProfiler:
+    """Profile request by cProfile and collect time and amount of queries by ORM call sites"""
+
+    call_sites_limit = 20
+    functions_limit = 40
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        self.profile = cProfile.Profile()
+        # Call site: (queries amount, queries time in seconds)
+        self.call_sites: Dict[str, Tuple[int, float]] = {}
+        self.duration = 0.0
+        self._start = None
+        self._wrappers = ExitStack()
+
+    def start(self):
+        for connection in connections.all():
+            self._wrappers.enter_context(connection.execute_wrapper(self.record_query))
+        self._start = time.perf_counter()
+        try:
+            self.profile.enable()
+        except BaseException:
+            self._wrappers.close()
+            raise
+
+    def stop(self):
+        try:
+            self.profile.disable()
+            self.duration = time.perf_counter() - self._start
+        finally:
+            self._wrappers.close()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            site = self.get_call_site()
+            amount, duration = self.call_sites.get(site, (0, 0.0))
+            self.call_sites[site] = (amount + 1, duration + time.perf_counter() - start)
+
+    @staticmethod
+    def get_call_site() -> str:
+        """Get innermost frame outside of Django and rest framework, which executes query"""
+        frame = sys._getframe(1)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if not filename.startswith(SKIPPED_PATHS):
+                return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+            frame = frame.f_back
+        return "<unknown>"
+
+    def get_summary(self, title: str) -> str:
+        queries = sum(amount for amount, _ in self.call_sites.values())
+        lines = [
+            title,
+            f"Reason: {self.reason}",
+            f"Duration: {self.duration * 1000:.3f} ms, queries: {queries}",
+            "",
+            "Top ORM call sites by queries time:",
+            f"{'queries':>8} {'time, ms':>10}  call site",
+        ]
+        top_sites = sorted(self.call_sites.items(), key=lambda site: site[1][1], reverse=True)
+        for site, (amount, duration) in top_sites[:self.call_sites_limit]:
+            lines.append(f"{amount:>8} {duration * 1000:>10.3f}  {site}")
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats("cumulative").print_stats(self.functions_limit)
+        lines.extend(["", stream.getvalue()])
+        return "\n".join(lines)
+
+    def write(self, directory: str, name: str, title: str) -> List[str]:
+        """Write pstats file and text summary, return written files paths"""
+        os.makedirs(directory, exist_ok=True)
+        base_path = os.path.join(
+            directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{os.getpid()}-{secrets.token_hex(4)}"
+        )
+        self.profile.dump_stats(f"{base_path}.pstats")
+        with open(f"{base_path}.txt", "w") as file:
+            file.write(self.get_summary(title))
+        return [f"{base_path}.pstats", f"{base_path}.txt"]
+
+    def finish(self, name: str, title: str):
+        """Stop profiling and write results, errors are logged instead of raising"""
+        try:
+            self.stop()
+            self.write(basket_settings.profiling_directory, name, title)
+        except Exception:
+            logger.exception("Basket profile writing failed")
+
+
+def start_profiler(reason: str) -> Optional[RequestProfiler]:
+    """Get started profiler, profiling is skipped if it can't be started, like when other profiler is active"""
+    profiler = RequestProfiler(reason=reason)
+    try:
+        profiler.start()
+    except Exception:
+        logger.exception("Basket profiling start failed")
+        return None
+    return profiler
+
+
+def get_sampled_profiler() -> Optional[RequestProfiler]:
+    """Get started profiler for configured rate of requests"""
+    if not basket_settings.profiling_directory or not basket_settings.profiling_rate:
+        return None
+    if random.random() >= basket_settings.profiling_rate:
+        return None
+    return start_profiler(f"sampled with rate {basket_settings.profiling_rate}")
+
+
+def get_threshold_profiler(basket) -> Optional[RequestProfiler]:
+    """
+        Get started profiler if basket contains not less items than configured threshold,
+        basket is already resolved and merged, so only following request processing is profiled
+    """
+    threshold = basket_settings.profiling_items_threshold
+    if not basket_settings.profiling_directory or threshold is None:
+        return None
+    items_amount = get_basket_items_amount(basket)
+    if items_amount < threshold:
+        return None
+    return start_profiler(f"basket of {items_amount} items, threshold is {threshold}")
@@ -0,0 +1,72 @@
+from typing import Callable, Type, List
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Resolve all submitted primary keys by single query, missing primary keys are reported together"""
+    default_error_messages = {
+        "does_not_exist": _('Invalid pks "{pk_values}" - objects do not exist.'),
+    }
+
+    def to_internal_value(self, data) -> List[Model]:
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        queryset = self.child_relation.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for pk in data:
+            try:
+                if isinstance(pk, bool):
+                    raise TypeError
+                pks.append(pk_field.to_python(pk))
+            except (TypeError, ValueError, DjangoValidationError):
+                self.child_relation.fail("incorrect_type", data_type=type(pk).__name__)
+
+        objects = queryset.in_bulk(pks)
+        missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            self.fail("does_not_exist", pk_values=", ".join(str(pk) for pk in missing))
+        # Keep submitted order
+        return [objects[pk] for pk in pks]
+
+
+class LazyPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+        Primary key related field which resolves settings configured model on validation, not on import.
+        With `many=True` all primary keys are resolved by single query.
+    """
+
+    def __init__(self, model_getter: Callable[[], Type[Model]] = None, **kwargs):
+        self.model_getter = model_getter
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        if self.queryset is not None:
+            return self.queryset.all()
+        return self.model_getter()._default_manager.all()
+
+
+class BasketItemsRelatedField(LazyPrimaryKeyRelatedField):
+    """Primary key related field scoped to items of basket passed in serializer context"""
+
+    def get_queryset(self):
+        basket = self.context.get("basket")
+        if basket is not None:
+            return basket.basket_items.all()
+        return super().get_queryset()
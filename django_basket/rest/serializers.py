@@ -1,13 +1,19 @@
 from typing import Optional, Union, List, Type
+from collections import defaultdict
 
+from django.db.models import Manager, Model
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 from django_basket.models import get_basket_model, BaseBasket
 from django_basket.models.item import DynamicBasketItem
 from ..settings import basket_settings
-from ..utils import load_module
+from ..utils import load_module, lazy_module, lazy_module_attributes
+from ..instrumentation import instrumented
+from .fields import LazyPrimaryKeyRelatedField, BasketItemsRelatedField
 
 
+@lazy_module
 def get_basket_item_serializer_class() -> Optional[Type[serializers.Serializer]]:
     serializer_class = load_module(basket_settings.items_serializer)
     if serializer_class:
@@ -15,31 +21,89 @@ def get_basket_item_serializer_class() -> Optional[Type[serializers.Serializer]]
     return None
 
 
-BasketRemovingModel = (
-    DynamicBasketItem
-    if basket_settings.is_dynamic
-    else load_module(basket_settings.basket_item_model)
-)
-BasketItemsSerializer = get_basket_item_serializer_class()
-BasketItemCreateSerializer = load_module(basket_settings.basket_item_create_serializer, BasketItemsSerializer)
+@lazy_module
+def get_basket_item_create_serializer_class() -> Optional[Type[serializers.Serializer]]:
+    return load_module(
+        basket_settings.basket_item_create_serializer,
+        get_basket_item_serializer_class()
+    )
+
+
+@lazy_module
+def get_basket_removing_model() -> Type[Model]:
+    if basket_settings.is_dynamic:
+        return DynamicBasketItem
+    return load_module(basket_settings.basket_item_model)
 
 
-def _get_basket_create_serializer_class():
-    if BasketItemCreateSerializer:
+def get_basket_adding_model() -> Type[Model]:
+    return load_module(basket_settings.basket_item_model)
+
+
+@lazy_module
+def get_basket_items_create_serializer_class() -> Type[serializers.Serializer]:
+    item_create_serializer_class = get_basket_item_create_serializer_class()
+    if item_create_serializer_class:
         class KlassSerializer(serializers.Serializer):
             basket_items = serializers.ListSerializer(
-                child=BasketItemCreateSerializer(), allow_empty=False
+                child=item_create_serializer_class(), allow_empty=False
             )
     else:
         class KlassSerializer(serializers.Serializer):
-            basket_items = serializers.PrimaryKeyRelatedField(
-                queryset=load_module(basket_settings.basket_item_model).objects.all(),
+            basket_items = LazyPrimaryKeyRelatedField(
+                model_getter=get_basket_adding_model,
                 many=True,
             )
-    return KlassSerializer
+    return load_module(basket_settings.basket_items_create_serializer, KlassSerializer)
+
+
+@lazy_module
+def get_basket_serializer_class() -> Type[serializers.Serializer]:
+    return load_module(basket_settings.basket_serializer, BasketSerializer)
+
+
+@lazy_module
+def get_basket_adding_serializer_class() -> Type[serializers.Serializer]:
+    return load_module(basket_settings.basket_adding_serializer, BasketAddSerializer)
+
+
+@lazy_module
+def get_basket_batch_serializer_class() -> Type[serializers.Serializer]:
+    return load_module(basket_settings.basket_batch_serializer, BasketBatchSerializer)
 
 
-BasketItemsCreateSerializer = _get_basket_create_serializer_class()
+# Backward compatibility of previously import time loaded module attributes
+lazy_module_attributes(__name__, {
+    "BasketRemovingModel": get_basket_removing_model,
+    "BasketItemsSerializer": get_basket_item_serializer_class,
+    "BasketItemCreateSerializer": get_basket_item_create_serializer_class,
+    "BasketItemsCreateSerializer": get_basket_items_create_serializer_class,
+})
+
+
+class DynamicProductListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        """
+            Load content objects with one query per content type
+            and serialize them by content type groups
+        """
+        items = DynamicBasketItem.load_content_objects(
+            data.all() if isinstance(data, Manager) else data
+        )
+        item_serializer_class = get_basket_item_serializer_class()
+        if item_serializer_class:
+            groups = defaultdict(list)
+            for item in items:
+                if DynamicBasketItem.content_object.is_cached(item):
+                    groups[item.content_type_id].append(item)
+            for group in groups.values():
+                serialized_objects = item_serializer_class(
+                    [item.content_object for item in group], many=True
+                ).data
+                for item, serialized_object in zip(group, serialized_objects):
+                    item.serialized_content_object = serialized_object
+        return super().to_representation(items)
 
 
 class DynamicProductSerializer(serializers.ModelSerializer):
@@ -48,40 +112,111 @@ class DynamicProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = DynamicBasketItem
         fields = ("id", "item")
+        list_serializer_class = DynamicProductListSerializer
 
     @staticmethod
     def get_item(obj: DynamicBasketItem) -> Union[serializers.Serializer, List[Union[int, str]]]:
-        if BasketItemsSerializer:
-            return BasketItemsSerializer(obj.content_object).data
+        item_serializer_class = get_basket_item_serializer_class()
+        if item_serializer_class:
+            if hasattr(obj, "serialized_content_object"):
+                # Already serialized by list serializer
+                return obj.serialized_content_object
+            return item_serializer_class(obj.content_object).data
         return obj.content_object.pk
 
 
+class LazyBasketModel:
+    """Meta model descriptor, which resolves configured basket model on access instead of import"""
+
+    def __get__(self, instance, owner) -> Type[BaseBasket]:
+        return get_basket_model()
+
+
 class BasketSerializer(serializers.ModelSerializer):
     basket_items = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
-        model = get_basket_model()
-        fields = "__all__"
+        model = LazyBasketModel()
+        # Version is optimistic locking state, not basket data
+        exclude = ("version",)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not basket_settings.is_items_amount_stored:
+            # Stored items amount isn't maintained, it's zero or stale
+            fields.pop("items_amount", None)
+        return fields
 
     @staticmethod
     def get_basket_items(obj: Type[BaseBasket]) -> Union[serializers.Serializer, List[Union[int, str]]]:
+        if obj.pk is None:
+            # Virtual basket is always empty
+            return []
         basket_items = obj.basket_items.all()
         if basket_settings.is_dynamic:
             return DynamicProductSerializer(basket_items, many=True).data
-        if BasketItemsSerializer:
-            return BasketItemsSerializer(basket_items, many=True).data
+        item_serializer_class = get_basket_item_serializer_class()
+        if item_serializer_class:
+            return item_serializer_class(basket_items, many=True).data
         return list(basket_items.values_list("pk", flat=True))
 
+    @instrumented(
+        "serialize_basket",
+        items=lambda data, serializer, instance: len(data["basket_items"]),
+        basket=lambda data, serializer, instance: instance,
+    )
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
 
 class BasketAddSerializer(serializers.Serializer):
-    basket_items = serializers.PrimaryKeyRelatedField(
-        queryset=load_module(basket_settings.basket_item_model).objects.all(),
+    basket_items = LazyPrimaryKeyRelatedField(
+        model_getter=get_basket_adding_model,
         many=True,
     )
 
 
 class BasketRemoveSerializer(serializers.Serializer):
-    basket_items = serializers.PrimaryKeyRelatedField(
-        queryset=BasketRemovingModel.objects.all(),
+    # Scoped to items of basket passed in context
+    basket_items = BasketItemsRelatedField(
+        model_getter=get_basket_removing_model,
         many=True,
     )
+
+
+class BasketBatchOperationSerializer(serializers.Serializer):
+    operation = serializers.ChoiceField(choices=("add", "remove", "clean"))
+    basket_items = serializers.ListField(required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        if attrs["operation"] != "clean" and "basket_items" not in attrs:
+            raise serializers.ValidationError({"basket_items": _("This field is required.")})
+        return attrs
+
+
+class BasketBatchSerializer(serializers.Serializer):
+    """
+        Ordered basket mutations, referenced items are validated by one query per operation type.
+        Removed items are validated against items contained in basket before batch.
+    """
+    operations = BasketBatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations: List[dict]) -> List[dict]:
+        related_fields = {
+            "add": LazyPrimaryKeyRelatedField(model_getter=get_basket_adding_model, many=True),
+            "remove": BasketItemsRelatedField(model_getter=get_basket_removing_model, many=True),
+        }
+        for operation_type, related_field in related_fields.items():
+            typed_operations = [
+                operation for operation in operations if operation["operation"] == operation_type
+            ]
+            if not typed_operations:
+                continue
+            related_field.bind(field_name="basket_items", parent=self)
+            items = iter(related_field.to_internal_value([
+                pk for operation in typed_operations for pk in operation["basket_items"]
+            ]))
+            # Resolved items are ordered as submitted primary keys
+            for operation in typed_operations:
+                operation["basket_items"] = [next(items) for pk in operation["basket_items"]]
+        return operations
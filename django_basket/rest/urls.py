@@ -1,20 +1,59 @@
+from typing import Any, Callable, Type
+
 from django.urls import path, include
+from django.views import View
 
 from . import views
 from ..settings import basket_settings
-from ..utils import load_module
+from ..utils import load_module, lazy_module
+
+
+class LazyView:
+    """
+        Resolve settings configured view on first use instead of urls import.
+        View attributes, like `cls` and `initkwargs` of rest framework views,
+        `csrf_exempt` or `__name__` and `__module__`, are taken from resolved view,
+        so middlewares, url resolver and schema generators see configured view.
+
+        Args:
+            setting: str - name of basket setting which contains path to configured view class
+            default: Type[View] - default view class
+    """
+
+    def __init__(self, setting: str, default: Type[View]):
+        self.setting = setting
+        self.default = default
+        self.get_view = lazy_module(self._load_view)
+        self.__module__ = default.__module__
+
+    def _load_view(self) -> Callable:
+        view = load_module(getattr(basket_settings, self.setting), self.default).as_view()
+        # Module is class attribute, so it's replaced instead of delegating
+        self.__module__ = view.__module__
+        return view
+
+    def __call__(self, request, *args, **kwargs):
+        return self.get_view()(request, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # Special attributes, except view names, and attributes of not initialized instance aren't delegated
+        is_special = name.startswith("__") and name not in ("__name__", "__qualname__")
+        if is_special or "get_view" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.get_view(), name)
 
 
 urlpatterns = [
     path(
         "basket/",
         include(((
-            path("receive/", load_module(basket_settings.retrieve_view, views.BasketRetrieveAPIView).as_view()),
-            path("create/items/", load_module(basket_settings.add_items_view, views.BasketItemCreateSerialize).as_view()),
-            path("add/", load_module(basket_settings.adding_view, views.BasketAddAPIView).as_view()),
-            path("remove/", load_module(basket_settings.removing_view, views.BasketRemoveProductsAPIView).as_view()),
-            path("clean/", load_module(basket_settings.clean_view, views.BasketCleanAPIView).as_view()),
-            path("amount/", load_module(basket_settings.items_amount_view, views.BasketAmountAPIVIew).as_view()),
+            path("receive/", LazyView("retrieve_view", views.BasketRetrieveAPIView)),
+            path("create/items/", LazyView("add_items_view", views.BasketItemCreateSerialize)),
+            path("add/", LazyView("adding_view", views.BasketAddAPIView)),
+            path("remove/", LazyView("removing_view", views.BasketRemoveProductsAPIView)),
+            path("clean/", LazyView("clean_view", views.BasketCleanAPIView)),
+            path("amount/", LazyView("items_amount_view", views.BasketAmountAPIVIew)),
+            path("batch/", LazyView("batch_view", views.BasketBatchAPIView)),
         ), "basket"))
     )
 ]
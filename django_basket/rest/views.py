@@ -1,3 +1,6 @@
+from typing import Any, Dict, Optional
+
+from django.utils.http import parse_etags
 from rest_framework.generics import RetrieveAPIView, CreateAPIView
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -5,35 +8,130 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from ..contrib.basket import BasketAggregator
+from ..contrib.cache import (
+    BASKET_ID_SESSION_KEY,
+    get_basket_version,
+    get_basket_etag,
+    get_cached_basket_data,
+    set_cached_basket_data,
+)
 from ..settings import basket_settings
+from ..profiling import RequestProfiler, get_sampled_profiler, get_threshold_profiler
 from ..models import get_basket_model
 from .serializers import (
-    BasketSerializer,
-    BasketAddSerializer,
     BasketRemoveSerializer,
-    BasketItemsCreateSerializer
+    get_basket_serializer_class,
+    get_basket_adding_serializer_class,
+    get_basket_items_create_serializer_class,
+    get_basket_batch_serializer_class,
 )
-from ..utils import load_module
 from ..shortcuts import get_basket_from_request, get_basket_aggregator, get_basket_items_amount
 
-BasketSerializer = load_module(basket_settings.basket_serializer, BasketSerializer)
-BasketAddSerializer = load_module(basket_settings.basket_adding_serializer, BasketAddSerializer)
-BasketItemsCreateSerializer = load_module(basket_settings.basket_items_create_serializer, BasketItemsCreateSerializer)
-
 
 class BasketGettingViewMixin:
-    model = get_basket_model()
+    # Missed basket will not be created by reading view with lazy basket creation
+    is_readonly_basket = False
+    profiler: Optional[RequestProfiler] = None
+
+    @property
+    def model(self):
+        return get_basket_model()
+
+    def dispatch(self, request, *args, **kwargs):
+        self.profiler = get_sampled_profiler()
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.profiler is not None:
+                self.profiler.finish(
+                    self.__class__.__name__,
+                    f"{request.method} {request.get_full_path()} by {self.__class__.__name__}",
+                )
 
     def get_object(self):
-        return get_basket_from_request(self.request)
+        basket = get_basket_from_request(self.request, is_readonly=self.is_readonly_basket)
+        if self.profiler is None:
+            # Large basket is profiled since it's resolved
+            self.profiler = get_threshold_profiler(basket)
+        return basket
+
+    def get_basket_serializer_context(self, basket) -> Dict[str, Any]:
+        # Basket is used by basket scoped fields
+        return {**self.get_serializer_context(), "basket": basket}
+
+    def get_basket_representation(self, basket) -> Any:
+        return get_basket_serializer_class()(basket).data
+
+
+class CachedBasketViewMixin:
+    """
+        Read-through cache of basket data, invalidated by basket version.
+        Respond `304 Not Modified` when `If-None-Match` contains actual version `ETag`.
+    """
+    cache_name = None
+
+    def get_basket_data(self, basket) -> Any:
+        raise NotImplementedError
+
+    def get_cached_response(self, request) -> Response:
+        if not basket_settings.is_caching:
+            return Response(self.get_basket_data(self.get_object()), status=status.HTTP_200_OK)
+
+        etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        basket_id = request.session.get(BASKET_ID_SESSION_KEY)
+        # Basket stored in session is actual only while there is no basket to merge
+        if basket_id is not None and not request.session.get_marker():
+            version = get_basket_version(basket_id)
+            if version is not None:
+                response = self._get_version_response(basket_id, version, etags)
+                if response is not None:
+                    return response
+
+        basket = self.get_object()
+        if basket.pk is None:
+            # Virtual basket isn't cached
+            return Response(self.get_basket_data(basket), status=status.HTTP_200_OK)
+        # Version must be received before data building, data of outdated version is never used
+        version = get_basket_version(basket.pk, is_creating=True)
+        response = self._get_version_response(basket.pk, version, etags)
+        if response is not None:
+            return response
+        data = self.get_basket_data(basket)
+        set_cached_basket_data(self.cache_name, basket.pk, version, data)
+        return Response(
+            data,
+            status=status.HTTP_200_OK,
+            headers={"ETag": get_basket_etag(self.cache_name, basket.pk, version)},
+        )
+
+    def _get_version_response(self, basket_id, version, etags):
+        etag = get_basket_etag(self.cache_name, basket_id, version)
+        if etag in etags or "*" in etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        data = get_cached_basket_data(self.cache_name, basket_id, version)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK, headers={"ETag": etag})
+        return None
+
+
+class BasketRetrieveAPIView(CachedBasketViewMixin, BasketGettingViewMixin, RetrieveAPIView):
+    cache_name = "basket"
+    is_readonly_basket = True
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(request)
 
-class BasketRetrieveAPIView(BasketGettingViewMixin, RetrieveAPIView):
-    serializer_class = BasketSerializer
+    def get_serializer_class(self):
+        return get_basket_serializer_class()
+
+    def get_basket_data(self, basket) -> Any:
+        return self.get_serializer(basket).data
 
 
 class BasketItemCreateSerialize(BasketGettingViewMixin, CreateAPIView):
-    serializer_class = BasketItemsCreateSerializer
+
+    def get_serializer_class(self):
+        return get_basket_items_create_serializer_class()
 
     def create(self, request, *args, **kwargs):
         # Get available basket
@@ -45,18 +143,20 @@ class BasketItemCreateSerialize(BasketGettingViewMixin, CreateAPIView):
         BasketAggregator(basket).create_items(
             serializer.validated_data.get("basket_items", [])
         )
-        return Response(BasketSerializer(basket).data, status=status.HTTP_201_CREATED)
+        return Response(self.get_basket_representation(basket), status=status.HTTP_201_CREATED)
 
 
 class BasketAddAPIView(BasketGettingViewMixin, CreateAPIView):
-    serializer_class = BasketAddSerializer
+
+    def get_serializer_class(self):
+        return get_basket_adding_serializer_class()
 
     def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
         basket = self.get_object()
+        serializer = self.get_serializer(data=request.data, context=self.get_basket_serializer_context(basket))
+        serializer.is_valid(raise_exception=True)
         BasketAggregator(basket).add_many(serializer.validated_data.get("basket_items", []))
-        return Response(BasketSerializer(basket).data, status=status.HTTP_201_CREATED)
+        return Response(self.get_basket_representation(basket), status=status.HTTP_201_CREATED)
 
     def get_object(self):
         return get_basket_from_request(self.request)
@@ -66,11 +166,11 @@ class BasketRemoveProductsAPIView(BasketGettingViewMixin, CreateAPIView):
     serializer_class = BasketRemoveSerializer
 
     def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
         basket = self.get_object()
+        serializer = self.get_serializer(data=request.data, context=self.get_basket_serializer_context(basket))
+        serializer.is_valid(raise_exception=True)
         BasketAggregator(basket).remove(serializer.validated_data.get("basket_items"))
-        return Response(BasketSerializer(basket).data, status=status.HTTP_201_CREATED)
+        return Response(self.get_basket_representation(basket), status=status.HTTP_201_CREATED)
 
     def get_object(self):
         return get_basket_from_request(self.request)
@@ -83,10 +183,34 @@ class BasketCleanAPIView(BasketGettingViewMixin, APIView):
         return Response({"status": "OK"}, status=status.HTTP_201_CREATED)
 
 
-class BasketAmountAPIVIew(BasketGettingViewMixin, APIView):
+class BasketBatchAPIView(BasketGettingViewMixin, CreateAPIView):
+    """Apply ordered adding, removing and cleaning operations with single price recalculation"""
+
+    def get_serializer_class(self):
+        return get_basket_batch_serializer_class()
+
+    def create(self, request, *args, **kwargs):
+        basket = self.get_object()
+        serializer = self.get_serializer(data=request.data, context=self.get_basket_serializer_context(basket))
+        serializer.is_valid(raise_exception=True)
+        aggregator = BasketAggregator(basket)
+        with aggregator.batch():
+            for operation in serializer.validated_data["operations"]:
+                if operation["operation"] == "add":
+                    aggregator.add_many(operation["basket_items"])
+                elif operation["operation"] == "remove":
+                    aggregator.remove(operation["basket_items"])
+                else:
+                    aggregator.empty_basket()
+        return Response(self.get_basket_representation(basket), status=status.HTTP_201_CREATED)
+
+
+class BasketAmountAPIVIew(CachedBasketViewMixin, BasketGettingViewMixin, APIView):
+    cache_name = "amount"
+    is_readonly_basket = True
 
     def get(self, request, *args, **kwargs):
-        return Response(
-            {"amount": get_basket_items_amount(self.get_object())},
-            status=status.HTTP_200_OK
-        )
+        return self.get_cached_response(request)
+
+    def get_basket_data(self, basket) -> Any:
+        return {"amount": get_basket_items_amount(basket)}
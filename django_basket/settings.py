@@ -2,6 +2,7 @@ from typing import Any, Optional
 
 from django.conf import settings
 from django.db import connection
+from django.utils.functional import cached_property
 
 
 SETTINGS_BLOCK = "DJANGO_BASKET"
@@ -10,23 +11,34 @@ SETTINGS_BLOCK = "DJANGO_BASKET"
 class Settings:
 
     def __init__(self):
-        self._settings = {}
+        self._configs = {}
         self.default_settings = getattr(settings, SETTINGS_BLOCK, {})
 
+    @property
+    def _settings(self) -> dict:
+        """Settings values are plain instance attributes, so reading them is ordinary attribute access"""
+        return self.__dict__
+
     def add(self, name, config=None, default=None):
+        self._configs[name] = (config, default)
         self._settings[name] = self.default_settings.get(config, default) if config else default
 
-    def __getattribute__(self, name):
-        local_settings = super().__getattribute__("_settings")
-        if name in local_settings:
-            return local_settings.get(name)
-        return super().__getattribute__(name)
+    @cached_property
+    def is_postgres(self) -> bool:
+        # Database backend is detected on first use, import doesn't touch connection
+        return connection.vendor == "postgresql"
+
+    def reload(self):
+        """Re-read values from project settings"""
+        self._settings.pop("is_postgres", None)
+        self.default_settings = getattr(settings, SETTINGS_BLOCK, {})
+        for name, (config, default) in self._configs.items():
+            self.add(name, config, default)
 
 
 basket_settings = Settings()
 
 # General
-basket_settings.add("is_postgres", default=(connection.vendor == "postgresql"))
 basket_settings.add("is_dynamic", "is_dynamic_basket_item_field", False)
 basket_settings.add("is_delete_removing", "is_delete_removing", False)
 basket_settings.add("adding_function", "basket_item_adding")
@@ -38,10 +50,31 @@ basket_settings.add("is_update_while_merging", "is_update_while_merging", False)
 basket_settings.add("merging", "merging")
 basket_settings.add("items_create_function", "items_create")
 basket_settings.add("basket_items_amount", "basket_amount_calculation")
+basket_settings.add("is_items_amount_stored", "is_items_amount_stored", False)
 basket_settings.add("is_merging_on_login", "is_merging_on_login", True)
+basket_settings.add("resolving_limit", "basket_resolving_limit", 10)
+basket_settings.add("is_lazy_creation", "is_lazy_basket_creation", False)
+# Cache
+basket_settings.add("is_caching", "is_basket_caching", False)
+basket_settings.add("cache_alias", "cache_alias", "default")
+basket_settings.add("cache_timeout", "cache_timeout")
 # Price stuff
 basket_settings.add("price_field_name", "price_field_name", "price")
 basket_settings.add("price_calc_function", "price_calculating")
+basket_settings.add("is_incremental_pricing", "is_incremental_price_calculation", False)
+basket_settings.add("is_optimistic_locking", "is_optimistic_locking", False)
+basket_settings.add("optimistic_locking_retries", "optimistic_locking_retries", 3)
+# Instrumentation
+basket_settings.add("is_instrumentation", "is_instrumentation", False)
+basket_settings.add(
+    "instrumentation_sinks", "instrumentation_sinks", ("django_basket.instrumentation.signal_sink",)
+)
+basket_settings.add("is_tracing", "is_tracing", False)
+basket_settings.add("tracing_exporters", "tracing_exporters", ("django_basket.tracing.memory_exporter",))
+basket_settings.add("tracing_file", "tracing_file")
+basket_settings.add("profiling_directory", "profiling_directory")
+basket_settings.add("profiling_rate", "profiling_rate", 0)
+basket_settings.add("profiling_items_threshold", "profiling_items_threshold")
 # Basket model
 basket_settings.add("basket_item_model", "item_model")
 basket_settings.add("basket_model", "basket_model")
@@ -51,6 +84,7 @@ basket_settings.add("items_serializer", "items_serializer")
 basket_settings.add("basket_adding_serializer", "adding_serializer")
 basket_settings.add("basket_item_create_serializer", "item_create_serializer")
 basket_settings.add("basket_items_create_serializer", "items_create_serializer")
+basket_settings.add("basket_batch_serializer", "batch_serializer")
 # Views
 basket_settings.add("retrieve_view", "retrieve_view")
 basket_settings.add("adding_view", "adding_view")
@@ -58,6 +92,7 @@ basket_settings.add("removing_view", "removing_view")
 basket_settings.add("clean_view", "clean_view")
 basket_settings.add("add_items_view", "add_items_view")
 basket_settings.add("items_amount_view", "items_amount_view")
+basket_settings.add("batch_view", "batch_view")
 # Admin
 basket_settings.add("basket_admin", "basket_admin")
 basket_settings.add("basket_item_admin_inline", "basket_item_admin_inline")
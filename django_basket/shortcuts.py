@@ -1,7 +1,8 @@
 from .models import BaseBasket
 from .contrib.basket import BasketAggregator
-from .contrib.selectors import get_session_basket
-from .utils import settings_function
+from .contrib.selectors import get_session_basket, get_virtual_basket
+from .contrib.cache import BASKET_ID_SESSION_KEY
+from .contrib.item import calculate_items_amount
 from .settings import basket_settings
 
 
@@ -12,12 +13,37 @@ __all__ = (
 )
 
 
-def get_basket_from_request(request) -> BaseBasket:
-    """Get basket from request"""
-    if not request.session.exists(request.session.session_key):
-        request.session.create()
+def get_basket_from_request(request, is_readonly: bool = False) -> BaseBasket:
+    """
+        Get basket from request, resolved basket is cached until request session or user change.
+
+        Args:
+            request: HttpRequest - current request
+            is_readonly: bool - basket is used for reading only. With lazy basket creation
+                missed basket and session will not be created, unsaved empty basket is returned
+    """
+    is_lazy = basket_settings.is_lazy_creation and is_readonly
     user = request.user if request.user.is_authenticated else None
-    return get_session_basket(request.session, user)
+    # Cache on django request, rest framework request is wrapper around it
+    request = getattr(request, "_request", request)
+    cache_key = (request.session.session_key, user.pk if user else None)
+    cached_key, basket = getattr(request, "_cached_basket", (None, None))
+    # Virtual basket is valid for reading only
+    if basket is not None and cached_key == cache_key and (basket.pk or is_lazy):
+        return basket
+
+    session_key = request.session.session_key
+    if session_key is None or not request.session.exists(session_key):
+        if is_lazy:
+            return get_virtual_basket(user)
+        request.session.create()
+    basket = get_session_basket(request.session, user, is_creating=not is_lazy)
+    is_session_outdated = request.session.get(BASKET_ID_SESSION_KEY) != basket.pk
+    if basket_settings.is_caching and basket.pk and is_session_outdated:
+        # Let cached endpoints find basket without its resolving
+        request.session[BASKET_ID_SESSION_KEY] = basket.pk
+    request._cached_basket = ((request.session.session_key, cache_key[1]), basket)
+    return basket
 
 
 def get_basket_aggregator(request) -> BasketAggregator:
@@ -25,6 +51,11 @@ def get_basket_aggregator(request) -> BasketAggregator:
     return BasketAggregator(get_basket_from_request(request))
 
 
-@settings_function(func_path=basket_settings.basket_items_amount)
 def get_basket_items_amount(basket: BaseBasket) -> int:
-    return basket.basket_items.count()
+    """Get amount of basket items, stored in basket row if it's enabled"""
+    if basket.pk is None:
+        # Virtual basket is always empty
+        return 0
+    if basket_settings.is_items_amount_stored:
+        return basket.items_amount
+    return calculate_items_amount(basket)
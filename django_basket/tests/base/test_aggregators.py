@@ -1,14 +1,22 @@
 from typing import *
+from io import StringIO
+from unittest import mock
 from decimal import Decimal
+from django.core.management import call_command
 from django.test import TestCase
 from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.db.models.signals import pre_delete
 from django.contrib.auth import get_user_model
 
 from django_basket.settings import basket_settings
+from django_basket.exceptions import BasketVersionConflict
+from django_basket.contrib.basket import BasketAggregator
 from django_basket.shortcuts import get_basket_aggregator, get_basket_items_amount
 from django_basket.models import BaseBasket
 
-from example_apps.products.models import Product
+from example_apps.products.models import Product, BasketItem
 from example_apps.products.basket import create_items
 from ..utils import overwrite_settings
 
@@ -95,29 +103,74 @@ class BasketAggregationTestCase(TestCase):
         self.assertFalse(bool(item2.id))
         self.assertFalse(bool(item3.id))
 
+    def test_set_based_deletion(self):
+        with overwrite_settings(is_delete_removing=True):
+            aggregator = get_basket_aggregator(self.request)
+            items = aggregator.create_items([
+                {"product": product, "amount": 1}
+                for product in [self.product1, self.product2, self.product3] * 10
+            ])
+            with CaptureQueriesContext(connection) as context:
+                aggregator.remove(items[:20])
+            deleting_queries = [query for query in context.captured_queries if query["sql"].startswith("DELETE")]
+            # Through table rows and items rows
+            self.assertEqual(len(deleting_queries), 2)
+            self.assertEqual(BasketItem.objects.count(), 10)
+            self.assertTrue(all(item.pk is None for item in items[:20]))
+
+            with CaptureQueriesContext(connection) as context:
+                aggregator.empty_basket()
+            deleting_queries = [query for query in context.captured_queries if query["sql"].startswith("DELETE")]
+            self.assertEqual(len(deleting_queries), 2)
+            self.assertEqual(BasketItem.objects.count(), 0)
+            self.assertEqual(aggregator.basket.price, 0)
+
+    def test_deletion_with_signals(self):
+        deleted = []
+
+        def receiver(instance, **kwargs):
+            deleted.append(instance.pk)
+
+        pre_delete.connect(receiver, sender=BasketItem)
+        try:
+            with overwrite_settings(is_delete_removing=True):
+                aggregator = get_basket_aggregator(self.request)
+                item1, item2, item3 = aggregator.create_items([
+                    {"product": self.product1, "amount": 1},
+                    {"product": self.product2, "amount": 3},
+                    {"product": self.product3, "amount": 5},
+                ])
+                removed_ids = [item1.pk, item2.pk]
+                aggregator.remove([item1, item2])
+                self.assertEqual(deleted, removed_ids)
+                aggregator.empty_basket()
+                self.assertEqual(deleted, [*removed_ids, item3.pk])
+        finally:
+            pre_delete.disconnect(receiver, sender=BasketItem)
+
     def test_removing_with_basket_delete(self):
-        basket_settings._settings["is_delete_removing"] = False
-        self.assertEqual(BaseBasket.objects.count(), 0)
-        aggregator = get_basket_aggregator(self.request)
-        items = aggregator.create_items([
-            {"product": self.product1, "amount": 1},
-            {"product": self.product2, "amount": 3},
-            {"product": self.product3, "amount": 5},
-        ])
-        self.assertEqual(get_basket_items_amount(aggregator.basket), 9)
-        aggregator.empty_basket()
+        with overwrite_settings(is_delete_removing=False):
+            self.assertEqual(BaseBasket.objects.count(), 0)
+            aggregator = get_basket_aggregator(self.request)
+            items = aggregator.create_items([
+                {"product": self.product1, "amount": 1},
+                {"product": self.product2, "amount": 3},
+                {"product": self.product3, "amount": 5},
+            ])
+            self.assertEqual(get_basket_items_amount(aggregator.basket), 9)
+            aggregator.empty_basket()
 
-        aggregator = get_basket_aggregator(self.request)
-        items2 = aggregator.create_items([
-            {"product": self.product1, "amount": 1},
-            {"product": self.product2, "amount": 3},
-            {"product": self.product3, "amount": 5},
-        ])
-        self.assertEqual(get_basket_items_amount(aggregator.basket), 9)
-        aggregator.remove(items)
+            aggregator = get_basket_aggregator(self.request)
+            items2 = aggregator.create_items([
+                {"product": self.product1, "amount": 1},
+                {"product": self.product2, "amount": 3},
+                {"product": self.product3, "amount": 5},
+            ])
+            self.assertEqual(get_basket_items_amount(aggregator.basket), 9)
+            aggregator.remove(items)
 
-        for item in [*items, *items2]:
-            self.assertTrue(bool(item))
+            for item in [*items, *items2]:
+                self.assertTrue(bool(item))
 
     def test_not_implemented_items_creation(self):
         with overwrite_settings(items_create_function=None):
@@ -130,3 +183,172 @@ class BasketAggregationTestCase(TestCase):
                     {"product": self.product2, "amount": 3},
                     {"product": self.product3, "amount": 5},
                 ])
+
+    def test_incremental_pricing(self):
+        with overwrite_settings(is_incremental_pricing=True):
+            aggregator = get_basket_aggregator(self.request)
+            item1, item2, item3 = aggregator.create_items([
+                {"product": self.product1, "amount": 1},
+                {"product": self.product2, "amount": 3},
+                {"product": self.product3, "amount": 5},
+            ])
+            self.assertEqual(aggregator.basket.price, Decimal(22))
+            # Adding of contained item doesn't change price
+            aggregator.add(item1)
+            self.assertEqual(aggregator.basket.price, Decimal(22))
+            aggregator.remove([item2])
+            self.assertEqual(aggregator.basket.price, Decimal(16))
+            self.assertEqual(aggregator.reconcile_price(), Decimal(0))
+            aggregator.empty_basket()
+            self.assertEqual(aggregator.basket.price, Decimal(0))
+            self.assertEqual(BaseBasket.objects.get().price, Decimal(0))
+            # Repeated item is added once
+            aggregator.add_many(create_items(aggregator.basket, [{"product": self.product2, "amount": 1}]) * 2)
+            self.assertEqual(aggregator.basket.price, Decimal(2))
+            self.assertEqual(aggregator.reconcile_price(), Decimal(0))
+
+    def test_price_reconciliation(self):
+        aggregator = get_basket_aggregator(self.request)
+        aggregator.create_items([
+            {"product": self.product1, "amount": 1},
+            {"product": self.product2, "amount": 3},
+        ])
+        BaseBasket.objects.update(price=5)
+        out = StringIO()
+        call_command("reconcile_basket_prices", "--dry-run", stdout=out)
+        self.assertIn("price drift 2.00", out.getvalue())
+        self.assertEqual(BaseBasket.objects.get().price, Decimal(5))
+        call_command("reconcile_basket_prices", stdout=StringIO())
+        self.assertEqual(BaseBasket.objects.get().price, Decimal(7))
+
+    def test_mutations_batch(self):
+        aggregator = get_basket_aggregator(self.request)
+        item1, item2, item3 = create_items(
+            aggregator.basket,
+            [
+                {"product": self.product1, "amount": 1},
+                {"product": self.product2, "amount": 3},
+                {"product": self.product3, "amount": 5},
+            ]
+        )
+        aggregator.add(item1)
+        with aggregator.batch():
+            aggregator.add_many([item2, item3])
+            aggregator.remove([item3])
+            aggregator.remove([item1])
+            # Nothing is applied before context exit
+            self.assertEqual(get_basket_items_amount(aggregator.basket), 1)
+        self.assertEqual(list(aggregator.basket.basket_items.all()), [item2])
+        self.assertEqual(aggregator.basket.price, Decimal(6))
+        self.assertEqual(BaseBasket.objects.get().price, Decimal(6))
+
+    def test_mutations_batch_contained_item_removing(self):
+        aggregator = get_basket_aggregator(self.request)
+        item1, item2 = aggregator.create_items([
+            {"product": self.product1, "amount": 1},
+            {"product": self.product2, "amount": 2},
+        ])
+        with aggregator.batch():
+            aggregator.add_many([item1])
+            aggregator.remove([item1])
+        self.assertEqual(list(aggregator.basket.basket_items.all()), [item2])
+        self.assertEqual(BaseBasket.objects.get().price, Decimal(4))
+
+        with aggregator.batch():
+            aggregator.remove([item2])
+            aggregator.add_many([item2])
+        self.assertEqual(list(aggregator.basket.basket_items.all()), [item2])
+        self.assertEqual(BaseBasket.objects.get().price, Decimal(4))
+
+    def test_mutations_batch_emptying(self):
+        aggregator = get_basket_aggregator(self.request)
+        aggregator.create_items([{"product": self.product1, "amount": 1}])
+        with aggregator.batch():
+            aggregator.empty_basket()
+            aggregator.create_items([{"product": self.product2, "amount": 3}])
+        self.assertEqual(get_basket_items_amount(aggregator.basket), 3)
+        self.assertEqual(aggregator.basket.price, Decimal(6))
+
+    def test_mutations_batch_discarding(self):
+        aggregator = get_basket_aggregator(self.request)
+        with self.assertRaises(ValueError):
+            with aggregator.batch():
+                aggregator.create_items([{"product": self.product1, "amount": 1}])
+                raise ValueError
+        self.assertEqual(get_basket_items_amount(aggregator.basket), 0)
+        self.assertEqual(aggregator.mutation_batch, None)
+
+    def test_stored_items_amount(self):
+        with overwrite_settings(is_items_amount_stored=True):
+            aggregator = get_basket_aggregator(self.request)
+            item1, item2, item3 = aggregator.create_items([
+                {"product": self.product1, "amount": 1},
+                {"product": self.product2, "amount": 3},
+                {"product": self.product3, "amount": 5},
+            ])
+            self.assertEqual(BaseBasket.objects.get().items_amount, 9)
+            aggregator.remove([item1])
+            self.assertEqual(get_basket_items_amount(aggregator.basket), 8)
+            with overwrite_settings(is_incremental_pricing=True):
+                aggregator.remove([item2])
+            self.assertEqual(get_basket_items_amount(aggregator.basket), 5)
+            aggregator.empty_basket()
+            with self.assertNumQueries(0):
+                self.assertEqual(get_basket_items_amount(aggregator.basket), 0)
+            self.assertEqual(BaseBasket.objects.get().items_amount, 0)
+
+    def test_stored_items_amount_reconciliation(self):
+        aggregator = get_basket_aggregator(self.request)
+        aggregator.create_items([
+            {"product": self.product1, "amount": 1},
+            {"product": self.product2, "amount": 3},
+        ])
+        # Amount storing is enabled for existing basket
+        with overwrite_settings(is_items_amount_stored=True):
+            self.assertEqual(get_basket_items_amount(BaseBasket.objects.get()), 0)
+            out = StringIO()
+            call_command("reconcile_basket_prices", "--dry-run", stdout=out)
+            self.assertIn("items amount drift 4", out.getvalue())
+            self.assertEqual(BaseBasket.objects.get().items_amount, 0)
+            call_command("reconcile_basket_prices", stdout=StringIO())
+            self.assertEqual(get_basket_items_amount(BaseBasket.objects.get()), 4)
+            self.assertEqual(BaseBasket.objects.get().price, Decimal(7))
+
+    def test_optimistic_locking(self):
+        with overwrite_settings(is_optimistic_locking=True):
+            aggregator = get_basket_aggregator(self.request)
+            item1, item2 = create_items(
+                aggregator.basket,
+                [{"product": self.product1, "amount": 1}, {"product": self.product2, "amount": 3}]
+            )
+            aggregator.add(item1)
+            self.assertEqual(BaseBasket.objects.get().version, 1)
+            # Concurrent request adds item and saves totals with another basket instance
+            concurrent = BasketAggregator(BaseBasket.objects.get())
+            concurrent.basket.basket_items.add(item2)
+            concurrent.basket.price = Decimal(100)
+            concurrent.save_totals()
+            # Stale version loses compare-and-swap, totals are recalculated from actual contents
+            aggregator.calculate_price()
+            basket = BaseBasket.objects.get()
+            self.assertEqual(basket.version, 3)
+            self.assertEqual(basket.price, Decimal(7))
+            self.assertEqual(aggregator.basket.version, 3)
+
+    def test_optimistic_locking_retries(self):
+        with overwrite_settings(is_optimistic_locking=True, optimistic_locking_retries=2):
+            aggregator = get_basket_aggregator(self.request)
+            item, = create_items(aggregator.basket, [{"product": self.product1, "amount": 1}])
+            basket_model = aggregator.basket.__class__
+            original = basket_model.refresh_from_db
+
+            def refresh_from_db(basket, *args, **kwargs):
+                original(basket, *args, **kwargs)
+                # Concurrent saving after every version reading
+                basket_model.objects.update(version=basket.version + 1)
+
+            with mock.patch.object(basket_model, "refresh_from_db", refresh_from_db):
+                BaseBasket.objects.update(version=10)
+                with self.assertRaises(BasketVersionConflict):
+                    aggregator.add(item)
+            self.assertEqual(aggregator.version_conflicts, 0)
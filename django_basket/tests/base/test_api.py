@@ -2,6 +2,8 @@ from typing import *
 from decimal import Decimal
 from django.test import TestCase
 from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.contrib.auth import get_user_model
 
 from rest_framework.test import APIRequestFactory, APIClient, APITestCase
@@ -51,6 +53,19 @@ class BasketAPITestCase(APITestCase):
         basket = BaseBasket.objects.first()
         self.assertEqual(response.data, BasketSerializer(basket).data)
 
+    def test_receive_payload(self):
+        self.client.get("/api/basket/receive/", format="json")
+        BasketAggregator(BaseBasket.objects.get()).create_items([{"product": self.product1, "amount": 3}])
+        response = self.client.get("/api/basket/receive/", format="json")
+        self.assertEqual(
+            set(response.data),
+            {"id", "basket_items", "created_at", "updated_at", "price", "session_id", "user"},
+        )
+        with overwrite_settings(is_items_amount_stored=True):
+            BasketAggregator(BaseBasket.objects.get()).calculate_price()
+            response = self.client.get("/api/basket/receive/", format="json")
+        self.assertEqual(response.data["items_amount"], 3)
+
     def test_create(self):
         response = self.client.post(
             "/api/basket/create/items/",
@@ -115,3 +130,117 @@ class BasketAPITestCase(APITestCase):
         amount_response = self.client.get("/api/basket/amount/")
         self.assertEqual(amount_response.status_code, status.HTTP_200_OK)
         self.assertEqual(amount_response.data, {"amount": 9})
+
+    def test_bulk_adding_validation(self):
+        BasketItem.objects.bulk_create([
+            BasketItem(product=self.product1, amount=1, price=self.product1.price) for _ in range(500)
+        ])
+        item_ids = list(BasketItem.objects.order_by("-pk").values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post("/api/basket/add/", data={"basket_items": item_ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Items are selected by primary keys only for validation, next queries are price and response
+        item_pk_column = f'"{BasketItem._meta.db_table}"."id" IN'
+        validation_queries = [query for query in context.captured_queries if item_pk_column in query["sql"]]
+        self.assertEqual(len(validation_queries), 1)
+        self.assertEqual(get_basket_items_amount(BaseBasket.objects.get()), 500)
+
+    def test_missing_items_validation(self):
+        basket_item = BasketItem.objects.create(product=self.product1, amount=1, price=self.product1.price)
+        response = self.client.post(
+            "/api/basket/add/",
+            data={"basket_items": [basket_item.id, 1000, 1001]},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["basket_items"],
+            ['Invalid pks "1000, 1001" - objects do not exist.']
+        )
+
+    def test_removing_scoped_to_basket(self):
+        self.test_create()
+        foreign_item = BasketItem.objects.create(product=self.product1, amount=1, price=self.product1.price)
+        basket_item = BaseBasket.objects.get().basket_items.first()
+        response = self.client.post(
+            "/api/basket/remove/",
+            data={"basket_items": [basket_item.id, foreign_item.id]},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(BasketItem.objects.filter(pk=basket_item.pk).exists())
+
+    def test_batch(self):
+        self.test_create()
+        basket = BaseBasket.objects.get()
+        contained_item = basket.basket_items.order_by("pk").first()
+        basket_item1 = BasketItem.objects.create(product=self.product1, amount=1, price=self.product1.price)
+        basket_item2 = BasketItem.objects.create(product=self.product2, amount=2, price=self.product2.price * 2)
+        response = self.client.post(
+            "/api/basket/batch/",
+            data={"operations": [
+                {"operation": "remove", "basket_items": [contained_item.id]},
+                {"operation": "add", "basket_items": [basket_item1.id]},
+                {"operation": "add", "basket_items": [basket_item2.id]},
+            ]},
+            format="json"
+        )
+        basket.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, BasketSerializer(basket).data)
+        self.assertNotIn(contained_item, basket.basket_items.all())
+        self.assertIn(basket_item1, basket.basket_items.all())
+        self.assertEqual(basket.price, self.product2.price * 3 + self.product3.price * 5 + 1 + 4)
+
+        response = self.client.post(
+            "/api/basket/batch/",
+            data={"operations": [
+                {"operation": "clean"},
+                {"operation": "add", "basket_items": [basket_item1.id]},
+            ]},
+            format="json"
+        )
+        basket.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(basket.basket_items.all()), [basket_item1])
+        self.assertEqual(basket.price, self.product1.price)
+
+    def test_batch_contained_item_removing(self):
+        self.test_create()
+        basket = BaseBasket.objects.get()
+        contained_item = basket.basket_items.order_by("pk").first()
+        response = self.client.post(
+            "/api/basket/batch/",
+            data={"operations": [
+                {"operation": "add", "basket_items": [contained_item.id]},
+                {"operation": "remove", "basket_items": [contained_item.id]},
+            ]},
+            format="json"
+        )
+        basket.refresh_from_db()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn(contained_item, basket.basket_items.all())
+        self.assertEqual(basket.price, self.product2.price * 3 + self.product3.price * 5)
+
+    def test_batch_validation(self):
+        self.test_create()
+        basket = BaseBasket.objects.get()
+        response = self.client.post(
+            "/api/basket/batch/",
+            data={"operations": [
+                {"operation": "clean"},
+                {"operation": "add", "basket_items": [1000]},
+                {"operation": "remove"},
+            ]},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(get_basket_items_amount(basket), 9)
+        response = self.client.post(
+            "/api/basket/batch/",
+            data={"operations": [{"operation": "add", "basket_items": [1000, 1001]}]},
+            format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["operations"], ['Invalid pks "1000, 1001" - objects do not exist.'])
+        self.assertEqual(get_basket_items_amount(basket), 9)
@@ -1,4 +1,11 @@
-from django.test import TestCase
+import copy
+from io import StringIO
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 from django.test.client import RequestFactory
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
@@ -9,9 +16,17 @@ from django_basket.shortcuts import (
     get_basket_items_amount,
 )
 from django_basket.contrib.basket import BasketAggregator
-from django_basket.contrib.selectors import get_empty_basket, get_basket, get_session_basket
-from django_basket.contrib.merging import merge_baskets_queryset, merge
+from django_basket.contrib.selectors import (
+    get_empty_basket,
+    get_basket,
+    get_baskets,
+    get_or_create_session_basket,
+    get_session_basket,
+    get_session_keys_basket,
+)
+from django_basket.contrib.merging import merge_baskets_queryset, merge, merge_baskets
 from django_basket.models import BaseBasket, get_basket_item_model
+from django_basket.middleware import BasketMiddleware
 
 from example_apps.products.models import Product
 from ..utils import overwrite_settings
@@ -65,6 +80,22 @@ class MergingSelectorsTestCase(TestCase):
             + self.product3.price * 4
         ))
 
+    def test_bulk_merging(self):
+        general = BasketAggregator(get_empty_basket())
+        shared_item, = general.create_items([{"product": self.product1, "amount": 1}])
+        proxies = [BasketAggregator(get_empty_basket()) for _ in range(10)]
+        for proxy in proxies:
+            proxy.create_items([{"product": self.product2, "amount": 1}])
+            # Item contained in several baskets will not be duplicated
+            proxy.add(shared_item)
+        # Statements count doesn't depend on baskets amount
+        with self.assertNumQueries(9):
+            merge_baskets_queryset([proxy.basket for proxy in proxies], general.basket)
+        self.assertEqual(BaseBasket.objects.count(), 1)
+        self.assertEqual(general.basket.basket_items.count(), 11)
+        self.assertEqual(get_basket_items_amount(general.basket), 11)
+        self.assertEqual(general.basket.price, self.product1.price + self.product2.price * 10)
+
     def test_merge_with_extra_data(self):
         basket1 = BasketAggregator(get_empty_basket())
         basket2 = BasketAggregator(get_empty_basket())
@@ -77,6 +108,15 @@ class MergingSelectorsTestCase(TestCase):
         general_basket = merge(basket1.basket, basket2.basket, price=200)
         self.assertEqual(general_basket.price, 200)
 
+    def test_merge_with_extra_data_of_stale_basket(self):
+        basket = get_empty_basket()
+        # Basket totals are saved concurrently
+        BaseBasket.objects.filter(pk=basket.pk).update(version=5)
+        merge_baskets(basket, [], user=self.user)
+        basket.refresh_from_db()
+        self.assertEqual(basket.user, self.user)
+        self.assertEqual(basket.version, 5)
+
     def test_session_merging(self):
         anonymous_aggregator = get_basket_aggregator(self.request)
         anonymous_aggregator.create_items([
@@ -107,11 +147,115 @@ class MergingSelectorsTestCase(TestCase):
         self.assertEqual(get_basket_items_amount(basket), 4)
         self.assertEqual(basket.price, self.product1.price * 2 + self.product2.price * 2)
 
+    def test_get_baskets_union(self):
+        basket1 = get_empty_basket(self.user, session_id="session1")
+        basket2 = get_empty_basket(session_id="session2")
+        get_empty_basket(session_id="session3")
+        with self.assertNumQueries(1):
+            baskets = get_baskets([
+                {"session_id": "session1"}, {"user": self.user}, {"session_id": "session2"},
+            ])
+        # Basket matched by several lookups is received once
+        self.assertEqual(baskets, [basket1, basket2])
+
+    def test_concurrent_basket_creation(self):
+        basket = get_empty_basket(session_id="session")
+        self.assertEqual(get_or_create_session_basket("session"), basket)
+        # Concurrent request has created basket after lookup miss
+        with mock.patch("django_basket.contrib.selectors.get_baskets", return_value=[]):
+            current_basket, is_merged = get_session_keys_basket("session")
+        self.assertEqual(current_basket, basket)
+        self.assertFalse(is_merged)
+        self.assertEqual(BaseBasket.objects.count(), 1)
+
     def test_get_basket_by_session_keys(self):
         get_session_basket(self.request.session, AnonymousUser())
         self.assertEqual(BaseBasket.objects.count(), 1)
 
+    def test_single_query_basket_resolving(self):
+        basket = get_empty_basket(session_id="session")
+        with self.assertNumQueries(1):
+            resolved, is_merged = get_session_keys_basket("session", "old_session", self.user)
+        self.assertEqual(resolved, basket)
+        self.assertFalse(is_merged)
+
+    def test_anonymous_baskets_isolation(self):
+        get_empty_basket(session_id="other_session")
+        basket = get_empty_basket(session_id="session")
+        resolved, _ = get_session_keys_basket("session", user=AnonymousUser())
+        self.assertEqual(resolved, basket)
+        self.assertEqual(BaseBasket.objects.count(), 2)
+
+    def test_old_session_basket_merging(self):
+        old_basket = BasketAggregator(get_empty_basket(session_id="old_session"))
+        old_basket.create_items([{"product": self.product1, "amount": 1}])
+        user_basket = BasketAggregator(get_empty_basket(self.user, session_id="user_session"))
+        user_basket.create_items([{"product": self.product2, "amount": 2}])
+        basket, is_merged = get_session_keys_basket("session", "old_session", self.user)
+        self.assertTrue(is_merged)
+        self.assertEqual(basket, user_basket.basket)
+        self.assertEqual(BaseBasket.objects.count(), 1)
+        self.assertEqual(basket.price, self.product1.price + self.product2.price * 2)
+
+    def test_request_basket_caching(self):
+        BasketMiddleware(lambda request: None).process_request(self.request)
+        # Basket isn't resolved until access
+        self.assertFalse(BaseBasket.objects.exists())
+        basket = get_basket_aggregator(self.request).basket
+        with self.assertNumQueries(0):
+            self.assertEqual(self.request.basket.pk, basket.pk)
+            self.assertIs(get_basket_aggregator(self.request).basket, basket)
+
     def test_not_exists_basket_item_model(self):
         with overwrite_settings(basket_item_model=None):
             with self.assertRaises(ImproperlyConfigured):
                 get_basket_item_model()
+
+
+class SessionBasketsMergingCommandTestCase(TransactionTestCase):
+
+    def setUp(self):
+        # Duplicated session baskets exist before session key becomes unique
+        unique_field = BaseBasket._meta.get_field("session_id")
+        field = copy.deepcopy(unique_field)
+        field._unique = False
+        with connection.schema_editor() as editor:
+            editor.alter_field(BaseBasket, unique_field, field)
+
+        def restore_constraint():
+            with connection.schema_editor() as editor:
+                editor.alter_field(BaseBasket, field, unique_field)
+
+        self.addCleanup(restore_constraint)
+        self.addCleanup(BaseBasket.objects.all().delete)
+        self.user = User.objects.create_user("user", "user@mail.com", "password")
+        self.product1 = Product.objects.create(title="title1", price=1)
+        self.product2 = Product.objects.create(title="title2", price=2)
+
+    def test_merging(self):
+        anonymous = BasketAggregator(get_empty_basket(session_id="session"))
+        anonymous.create_items([{"product": self.product1, "amount": 1}])
+        user_basket = BasketAggregator(get_empty_basket(session_id="session", user=self.user))
+        user_basket.create_items([{"product": self.product2, "amount": 2}])
+        other = BasketAggregator(get_empty_basket(session_id="other"))
+        other.create_items([{"product": self.product1, "amount": 1}])
+
+        out = StringIO()
+        call_command("merge_session_baskets", "--dry-run", stdout=out)
+        self.assertIn("Session session: 2 baskets", out.getvalue())
+        self.assertEqual(BaseBasket.objects.count(), 3)
+
+        out = StringIO()
+        call_command("merge_session_baskets", stdout=out)
+        self.assertIn("Duplicated sessions: 1", out.getvalue())
+        # User basket is kept with items of anonymous basket and recalculated price
+        basket = BaseBasket.objects.get(session_id="session")
+        self.assertEqual(basket.pk, user_basket.basket.pk)
+        self.assertEqual(basket.user, self.user)
+        self.assertEqual(get_basket_items_amount(basket), 3)
+        self.assertEqual(basket.price, Decimal(5))
+        self.assertEqual(BaseBasket.objects.get(session_id="other").basket_items.count(), 1)
+
+        out = StringIO()
+        call_command("merge_session_baskets", stdout=out)
+        self.assertIn("Duplicated sessions: 0", out.getvalue())
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+
+from django_basket.instrumentation import operation_measured, metrics, registry_sink
+from django_basket.contrib.merging import merge
+from django_basket.contrib.selectors import get_empty_basket
+from django_basket.rest.serializers import BasketSerializer
+from django_basket.shortcuts import get_basket_aggregator
+
+from example_apps.products.models import Product
+from example_apps.products.basket import create_items
+
+
+User = get_user_model()
+
+
+def instrumentation_settings(*sinks: str):
+    return override_settings(DJANGO_BASKET={
+        **settings.DJANGO_BASKET,
+        "is_instrumentation": True,
+        "instrumentation_sinks": sinks,
+    })
+
+
+class InstrumentationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("user", "user@mail.com", "password")
+        self.request = RequestFactory().get("/admin/login/")
+        self.request.session = self.client.session
+        self.request.user = self.user
+        self.product = Product.objects.create(title="title", price=1)
+        self.measurements = []
+        operation_measured.connect(self.receive_measurement)
+        self.addCleanup(operation_measured.disconnect, self.receive_measurement)
+
+    def receive_measurement(self, sender, measurement, **kwargs):
+        self.measurements.append(measurement)
+
+    def test_disabled(self):
+        aggregator = get_basket_aggregator(self.request)
+        create_items(aggregator.basket, [{"product": self.product, "amount": 1}])
+        self.assertEqual(self.measurements, [])
+
+    def test_signal_sink(self):
+        with instrumentation_settings("django_basket.instrumentation.signal_sink"):
+            aggregator = get_basket_aggregator(self.request)
+            items = aggregator.add_many(
+                create_items(aggregator.basket, [{"product": self.product, "amount": n} for n in (1, 2)])
+            )
+            aggregator.remove(items[:1])
+            aggregator.empty_basket()
+
+        operations = {measurement.operation: measurement for measurement in self.measurements}
+        measured = ("get_session_basket", "calculate_price", "add_items", "remove", "empty_basket")
+        # Nested price calculation is emitted before operation which is completed later
+        self.assertEqual(
+            [measurement.operation for measurement in self.measurements if measurement.operation in measured],
+            [
+                "get_session_basket",
+                "calculate_price", "add_items",
+                "calculate_price", "remove",
+                "calculate_price", "empty_basket",
+            ],
+        )
+        self.assertEqual(operations["add_items"].items, 2)
+        self.assertEqual(operations["remove"].items, 1)
+        self.assertIsNone(operations["empty_basket"].items)
+        for measurement in self.measurements:
+            self.assertGreater(measurement.queries, 0)
+            self.assertGreaterEqual(measurement.duration, 0)
+
+    def test_merging_and_serialization(self):
+        basket = get_empty_basket()
+        proxy = get_empty_basket()
+        proxy.basket_items.add(*create_items(proxy, [{"product": self.product, "amount": 1}]))
+        with instrumentation_settings("django_basket.instrumentation.signal_sink"):
+            merge(basket, proxy)
+            BasketSerializer(basket).data
+        merging, serialization = [
+            measurement for measurement in self.measurements
+            if measurement.operation in ("merge", "serialize_basket")
+        ]
+        self.assertEqual(merging.operation, "merge")
+        self.assertEqual(serialization.items, 1)
+        self.assertEqual(serialization.queries, 1)
+
+    def test_logging_sink(self):
+        with instrumentation_settings("django_basket.instrumentation.logging_sink"):
+            with self.assertLogs("django_basket.instrumentation", "INFO") as logs:
+                get_basket_aggregator(self.request).calculate_price()
+        self.assertEqual(self.measurements, [])
+        self.assertTrue(logs.records[-1].getMessage().startswith("Basket calculate_price: "))
+        self.assertEqual(logs.records[-1].basket_measurement["operation"], "calculate_price")
+
+    def test_registry_sink(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        with instrumentation_settings(f"{registry_sink.__module__}.registry_sink"):
+            aggregator = get_basket_aggregator(self.request)
+            aggregator.add_many(
+                create_items(aggregator.basket, [{"product": self.product, "amount": n} for n in (1, 2, 3)])
+            )
+
+        collected = metrics.collect()
+        self.assertEqual(collected["add_items"]["count"], 1)
+        self.assertEqual(collected["add_items"]["items"], 3)
+        self.assertEqual(collected["calculate_price"]["count"], 1)
+        self.assertEqual(sum(collected["calculate_price"]["buckets"]), 1)
+        rendered = metrics.render()
+        self.assertIn('django_basket_operation_duration_seconds_count{operation="add_items"} 1', rendered)
+        self.assertIn('django_basket_operation_items_total{operation="add_items"} 3', rendered)
+        self.assertIn('django_basket_operation_duration_seconds_bucket{operation="add_items",le="+Inf"} 1', rendered)
@@ -0,0 +1,110 @@
+import cProfile
+import os
+import pstats
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django_basket.contrib.basket import BasketAggregator
+from django_basket.models import BaseBasket
+
+from example_apps.products.models import Product
+
+
+def profiling_settings(**profiling):
+    return override_settings(DJANGO_BASKET={**settings.DJANGO_BASKET, **profiling})
+
+
+class ProfilingTestCase(APITestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.product = Product.objects.create(title="title", price=1)
+
+    def get_written_files(self):
+        return sorted(os.listdir(self.directory))
+
+    def create_basket_items(self, amount: int):
+        self.client.get("/api/basket/receive/", format="json")
+        BasketAggregator(BaseBasket.objects.get()).create_items(
+            [{"product": self.product, "amount": 1} for _ in range(amount)]
+        )
+
+    def test_disabled(self):
+        with profiling_settings(profiling_rate=1):
+            # Profiling directory isn't configured
+            self.client.get("/api/basket/receive/", format="json")
+        with profiling_settings(profiling_directory=self.directory):
+            self.client.get("/api/basket/receive/", format="json")
+        self.assertEqual(self.get_written_files(), [])
+
+    def test_sampled_profiling(self):
+        with profiling_settings(profiling_directory=self.directory, profiling_rate=1):
+            response = self.client.get("/api/basket/receive/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pstats_file, summary_file = self.get_written_files()
+        self.assertTrue(pstats_file.endswith(".pstats"))
+        self.assertIn("BasketRetrieveAPIView", pstats_file)
+        self.assertTrue(pstats.Stats(os.path.join(self.directory, pstats_file)).total_calls)
+
+        with open(os.path.join(self.directory, summary_file)) as file:
+            summary = file.read()
+        self.assertTrue(summary.startswith("GET /api/basket/receive/ by BasketRetrieveAPIView\n"))
+        self.assertIn("Reason: sampled with rate 1\n", summary)
+        self.assertIn("Top ORM call sites by queries time:", summary)
+        # Queries are attributed to basket code instead of Django internals
+        self.assertIn(os.path.join("django_basket", "contrib", "selectors.py"), summary)
+        self.assertNotIn(os.path.join("django", "db", "models", "query.py"), summary.split("\n\n")[1])
+
+    def test_threshold_profiling(self):
+        self.create_basket_items(3)
+        with profiling_settings(profiling_directory=self.directory, profiling_items_threshold=4):
+            self.client.get("/api/basket/receive/", format="json")
+        self.assertEqual(self.get_written_files(), [])
+
+        with profiling_settings(profiling_directory=self.directory, profiling_items_threshold=3):
+            self.client.get("/api/basket/amount/", format="json")
+        pstats_file, summary_file = self.get_written_files()
+        self.assertIn("BasketAmountAPIVIew", summary_file)
+        with open(os.path.join(self.directory, summary_file)) as file:
+            self.assertIn("Reason: basket of 3 items, threshold is 3\n", file.read())
+
+    def test_writing_error(self):
+        path = os.path.join(self.directory, "file")
+        open(path, "w").close()
+        with profiling_settings(profiling_directory=path, profiling_rate=1):
+            with self.assertLogs("django_basket.profiling", "ERROR"):
+                response = self.client.get("/api/basket/receive/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_starting_error(self):
+        self.create_basket_items(1)
+        with mock.patch.object(cProfile.Profile, "enable", side_effect=ValueError("Another profiler is active")):
+            with profiling_settings(profiling_directory=self.directory, profiling_rate=1), \
+                    self.assertLogs("django_basket.profiling", "ERROR"):
+                response = self.client.get("/api/basket/receive/", format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            with profiling_settings(profiling_directory=self.directory, profiling_items_threshold=1), \
+                    self.assertLogs("django_basket.profiling", "ERROR"):
+                response = self.client.get("/api/basket/amount/", format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_written_files(), [])
+
+    def test_stopping_error(self):
+        disable = cProfile.Profile.disable
+
+        def failing_disable(profile):
+            disable(profile)
+            raise RuntimeError
+
+        with mock.patch.object(cProfile.Profile, "disable", failing_disable):
+            with profiling_settings(profiling_directory=self.directory, profiling_rate=1), \
+                    self.assertLogs("django_basket.profiling", "ERROR"):
+                response = self.client.get("/api/basket/receive/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from django_basket.instrumentation import instrumented
+from django_basket.contrib.basket import BasketAggregator
+from django_basket.contrib.selectors import get_empty_basket, get_session_keys_basket
+from django_basket.tracing import memory_exporter, get_current_span, OpenTelemetryExporter, ThreadLocalVar
+
+from example_apps.products.models import Product
+from example_apps.products.basket import create_items
+
+
+def tracing_settings(*exporters: str, **extra):
+    return override_settings(DJANGO_BASKET={
+        **settings.DJANGO_BASKET,
+        "is_tracing": True,
+        "tracing_exporters": exporters,
+        **extra,
+    })
+
+
+@instrumented("failing")
+def failing_operation():
+    raise ValueError
+
+
+class TracingTestCase(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(title="title", price=1)
+        memory_exporter.clear()
+        self.addCleanup(memory_exporter.clear)
+
+    def test_disabled(self):
+        get_session_keys_basket("current")
+        self.assertEqual(memory_exporter.get_finished_spans(), [])
+
+    def test_nested_spans(self):
+        old_basket = get_empty_basket(session_id="old")
+        old_basket.basket_items.add(*create_items(old_basket, [{"product": self.product, "amount": 1}]))
+        with tracing_settings("django_basket.tracing.memory_exporter"):
+            basket, is_merged = get_session_keys_basket("current", "old")
+            BasketAggregator(basket).add_many(create_items(basket, [{"product": self.product, "amount": 2}]))
+        self.assertTrue(is_merged)
+        self.assertIsNone(get_current_span())
+
+        spans = {span.name: span for span in memory_exporter.get_finished_spans()}
+        resolving = spans["get_session_keys_basket"]
+        self.assertIsNone(resolving.parent)
+        self.assertEqual(resolving.attributes["basket.id"], basket.pk)
+        self.assertIs(spans["get_baskets"].parent, resolving)
+        self.assertIs(spans["get_or_create_session_basket"].parent, resolving)
+        self.assertIs(spans["merge"].parent, resolving)
+        self.assertEqual(spans["merge"].trace_id, resolving.trace_id)
+        self.assertEqual(spans["merge"].attributes["basket.id"], basket.pk)
+        # Merged basket price is recalculated inside merging
+        merge_calculation, adding_calculation = [
+            span for span in memory_exporter.get_finished_spans() if span.name == "calculate_price"
+        ]
+        self.assertIs(merge_calculation.parent, spans["merge"])
+        self.assertIs(adding_calculation.parent, spans["add_items"])
+        self.assertNotEqual(spans["add_items"].trace_id, resolving.trace_id)
+        self.assertEqual(spans["add_items"].attributes["basket.items"], 1)
+        self.assertGreater(spans["add_items"].attributes["db.queries"], adding_calculation.attributes["db.queries"])
+        self.assertLessEqual(resolving.start_time, spans["merge"].start_time)
+        self.assertLessEqual(spans["merge"].end_time, resolving.end_time)
+
+    def test_thread_local_spans(self):
+        # Python 3.6 keeps current span per thread
+        with mock.patch("django_basket.tracing._current_span", ThreadLocalVar("django_basket_span")), \
+                tracing_settings("django_basket.tracing.memory_exporter"):
+            instrumented("outer")(lambda: BasketAggregator(get_empty_basket()).calculate_price())()
+            self.assertIsNone(get_current_span())
+        resolving, calculation, outer = memory_exporter.get_finished_spans()
+        self.assertIsNone(outer.parent)
+        self.assertIs(resolving.parent, outer)
+        self.assertIs(calculation.parent, outer)
+
+    def test_failed_span(self):
+        with tracing_settings("django_basket.tracing.memory_exporter"):
+            with self.assertRaises(ValueError):
+                failing_operation()
+        span, = memory_exporter.get_finished_spans()
+        self.assertEqual(span.attributes, {"db.queries": 0, "error": "ValueError"})
+        self.assertIsNone(get_current_span())
+
+    def test_file_exporter(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "spans.jsonl")
+        with tracing_settings("django_basket.tracing.FileSpanExporter", tracing_file=path):
+            basket = get_empty_basket()
+            BasketAggregator(basket).calculate_price()
+        with open(path) as file:
+            spans = [json.loads(line) for line in file]
+        self.assertEqual([span["name"] for span in spans], ["get_empty_basket", "calculate_price"])
+        self.assertEqual(spans[1]["attributes"]["basket.id"], basket.pk)
+        self.assertIsNone(spans[1]["parent_id"])
+
+        with tracing_settings("django_basket.tracing.FileSpanExporter"):
+            with self.assertRaises(ImproperlyConfigured):
+                get_empty_basket()
+        self.assertIsNone(get_current_span())
+
+    def test_opentelemetry_exporter(self):
+        with mock.patch("django_basket.tracing.otel_trace", None):
+            with self.assertRaises(ImproperlyConfigured):
+                OpenTelemetryExporter()
+
+        otel_trace, otel_context = mock.MagicMock(), mock.MagicMock()
+        otel_span = otel_trace.get_tracer.return_value.start_span.return_value
+        with mock.patch("django_basket.tracing.otel_trace", otel_trace), \
+                mock.patch("django_basket.tracing.otel_context", otel_context), \
+                tracing_settings("django_basket.tracing.OpenTelemetryExporter"):
+            basket = get_empty_basket()
+        otel_trace.get_tracer.return_value.start_span.assert_called_once_with("get_empty_basket")
+        otel_context.attach.assert_called_once_with(otel_trace.set_span_in_context.return_value)
+        otel_context.detach.assert_called_once_with(otel_context.attach.return_value)
+        otel_span.set_attributes.assert_called_once_with({"basket.id": basket.pk, "db.queries": 1})
+        self.assertEqual(otel_span.end.call_count, 1)
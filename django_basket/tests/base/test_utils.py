@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import resolve
+
+from django_basket.settings import basket_settings
+from django_basket.contrib.item import calculate_items_amount
+from django_basket.contrib.selectors import get_empty_basket
+from django_basket.utils import hooks
+
+
+def get_constant_items_amount(basket) -> int:
+    return 42
+
+
+class HookRegistryTestCase(TestCase):
+
+    def test_settings_rebinding(self):
+        basket = get_empty_basket()
+        self.assertEqual(calculate_items_amount(basket), 0)
+        with override_settings(DJANGO_BASKET={
+            **settings.DJANGO_BASKET,
+            "basket_amount_calculation": f"{__name__}.get_constant_items_amount",
+            "is_merging_on_login": False,
+        }):
+            self.assertFalse(basket_settings.is_merging_on_login)
+            self.assertEqual(calculate_items_amount(basket), 42)
+        self.assertTrue(basket_settings.is_merging_on_login)
+        self.assertEqual(calculate_items_amount(basket), 0)
+
+    def test_compiled_hooks(self):
+        hooks.clear()
+        hooks.compile()
+        self.assertIn(calculate_items_amount.__wrapped__, hooks.compiled)
+        self.assertIsInstance(hooks.measure_overhead(number=1000), float)
+
+    def test_lazy_modules(self):
+        from django_basket.contrib.item import (
+            get_basket_item_aggregator_class, BasketItemAggregator, DynamicBasketItemAggregator
+        )
+
+        self.assertIs(get_basket_item_aggregator_class(), BasketItemAggregator)
+        with override_settings(DJANGO_BASKET={
+            **settings.DJANGO_BASKET,
+            "item_aggregator": "django_basket.contrib.item.DynamicBasketItemAggregator",
+        }):
+            self.assertIs(get_basket_item_aggregator_class(), DynamicBasketItemAggregator)
+            # Previous module attribute is resolved on access
+            from django_basket.contrib.item import basket_use_case_class
+            self.assertIs(basket_use_case_class, DynamicBasketItemAggregator)
+        self.assertIs(get_basket_item_aggregator_class(), BasketItemAggregator)
+        with self.assertRaises(ImportError):
+            from django_basket.contrib.item import missed_attribute  # noqa: F401
+
+    def test_lazy_views(self):
+        from rest_framework.schemas.generators import EndpointEnumerator
+        from django_basket.rest import views
+        from django_basket.rest.urls import urlpatterns
+
+        # Rest framework views are found by schema generators
+        endpoints = {
+            path: callback for path, method, callback in EndpointEnumerator(urlpatterns).get_api_endpoints()
+        }
+        self.assertIn("/basket/receive/", endpoints)
+        self.assertIs(endpoints["/basket/receive/"].cls, views.BasketRetrieveAPIView)
+        self.assertTrue(endpoints["/basket/receive/"].csrf_exempt)
+        with override_settings(DJANGO_BASKET={
+            **settings.DJANGO_BASKET,
+            "retrieve_view": "django_basket.rest.views.BasketAmountAPIVIew",
+        }):
+            self.assertIs(endpoints["/basket/receive/"].cls, views.BasketAmountAPIVIew)
+            self.assertEqual(
+                resolve("/api/basket/receive/").view_name, "basket:django_basket.rest.views.BasketAmountAPIVIew"
+            )
+
+        # Url resolver names endpoints by configured views
+        self.assertEqual(
+            resolve("/api/basket/receive/").view_name, "basket:django_basket.rest.views.BasketRetrieveAPIView"
+        )
+        self.assertEqual(resolve("/api/basket/add/")._func_path, "django_basket.rest.views.BasketAddAPIView")
+
+    def test_lazy_serializer_model(self):
+        from django_basket.models import BaseBasket
+        from django_basket.rest.serializers import BasketSerializer
+
+        self.assertIs(BasketSerializer.Meta.model, BaseBasket)
+        self.assertIn("basket_items", BasketSerializer().fields)
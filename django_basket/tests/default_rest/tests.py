@@ -3,14 +3,17 @@ from decimal import Decimal
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
 
-from rest_framework.test import APIRequestFactory, APIClient, APITestCase
+from django.db.transaction import atomic
+from rest_framework.test import APIRequestFactory, APIClient, APITestCase, APITransactionTestCase
 from rest_framework import status
 
 from django_basket.rest.serializers import BasketSerializer
 from django_basket.models import BaseBasket
 from django_basket.contrib.basket import BasketAggregator
 from django_basket.shortcuts import get_basket_items_amount
+from django_basket.contrib.cache import get_basket_version
 
 from example_apps.products.models import Product, BasketItem
 from example_apps.products.basket import create_items
@@ -19,7 +22,7 @@ from ..utils import overwrite_settings
 User = get_user_model()
 
 
-class BasketAPITestCase(APITestCase):
+class BasketAPIDataMixin:
 
     def setUp(self):
         self.username = "user"
@@ -37,6 +40,9 @@ class BasketAPITestCase(APITestCase):
         self.basket_item1 = BasketItem.objects.create(product=self.product1, amount=1, price=self.product1.price)
         self.basket_item2 = BasketItem.objects.create(product=self.product2, amount=2, price=self.product2.price * 2)
 
+
+class BasketAPITestCase(BasketAPIDataMixin, APITestCase):
+
     def test_receive(self):
         response = self.client.get("/api/basket/receive/", format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -62,3 +68,84 @@ class BasketAPITestCase(APITestCase):
         self.assertEqual(response.data, BasketSerializer(basket).data)
         self.assertEqual(basket.price, self.product1.price + self.product2.price * 2)
         self.assertEqual(get_basket_items_amount(basket), 3)
+
+    def test_lazy_basket_creation(self):
+        with overwrite_settings(is_lazy_creation=True):
+            sessions_count = Session.objects.count()
+            # Visitor without session
+            client = APIClient()
+            response = client.get("/api/basket/receive/", format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["basket_items"], [])
+            response = client.get("/api/basket/amount/")
+            self.assertEqual(response.data, {"amount": 0})
+            self.assertFalse(BaseBasket.objects.exists())
+            self.assertEqual(Session.objects.count(), sessions_count)
+            # Basket is created by first mutation
+            client.post(
+                "/api/basket/add/",
+                data={"basket_items": [self.basket_item1.id]},
+                format="json"
+            )
+            response = client.get("/api/basket/amount/")
+            self.assertEqual(response.data, {"amount": 1})
+            self.assertEqual(BaseBasket.objects.count(), 1)
+
+
+class CachedBasketAPITestCase(BasketAPIDataMixin, APITransactionTestCase):
+    """Cached data version is changed on commit, so transaction isn't wrapping tests"""
+
+    def test_cached_receive(self):
+        with overwrite_settings(is_caching=True):
+            response = self.client.get("/api/basket/receive/", format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response["ETag"]
+            # Session loading only
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/basket/receive/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/basket/receive/", format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["ETag"], etag)
+            # Basket mutation changes version
+            self.client.post(
+                "/api/basket/add/",
+                data={"basket_items": [self.basket_item1.id]},
+                format="json"
+            )
+            response = self.client.get("/api/basket/receive/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response["ETag"], etag)
+            self.assertEqual(response.data, BasketSerializer(BaseBasket.objects.get()).data)
+
+    def test_cached_amount(self):
+        with overwrite_settings(is_caching=True):
+            self.client.post(
+                "/api/basket/add/",
+                data={"basket_items": [self.basket_item1.id, self.basket_item2.id]},
+                format="json"
+            )
+            response = self.client.get("/api/basket/amount/")
+            self.assertEqual(response.data, {"amount": 3})
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/basket/amount/", HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.client.post("/api/basket/clean/")
+            response = self.client.get("/api/basket/amount/")
+            self.assertEqual(response.data, {"amount": 0})
+
+    def test_version_bump_on_commit(self):
+        with overwrite_settings(is_caching=True):
+            response = self.client.get("/api/basket/receive/")
+            basket = BaseBasket.objects.get()
+            version = get_basket_version(basket.pk)
+            with atomic():
+                BasketAggregator(basket).add(self.basket_item1)
+                # Readers don't see new version until mutation is committed
+                self.assertEqual(get_basket_version(basket.pk), version)
+                self.assertEqual(
+                    self.client.get("/api/basket/receive/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code,
+                    status.HTTP_304_NOT_MODIFIED,
+                )
+            self.assertNotEqual(get_basket_version(basket.pk), version)
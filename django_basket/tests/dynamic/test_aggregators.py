@@ -1,13 +1,21 @@
 from typing import *
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
 from django.test import TestCase
 from django.test.client import RequestFactory
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 
 from django_basket.models.item import DynamicBasketItem
 from django_basket.shortcuts import get_basket_aggregator, get_basket_items_amount
 from django_basket.models import BaseBasket, get_basket_item_model
+from django_basket.contrib.basket import BasketAggregator
+from django_basket.contrib.merging import merge
+from django_basket.contrib.selectors import get_empty_basket
 
-from example_apps.products.models import Product
+from example_apps.products.models import Product, BasketItem
+from ..utils import overwrite_settings
 
 
 User = get_user_model()
@@ -70,3 +78,110 @@ class BasketAggregationTestCase(TestCase):
         self.assertNotIn(item3, aggregator.basket.basket_items.all())
         self.assertEqual(get_basket_items_amount(aggregator.basket), 0)
         self.assertFalse(DynamicBasketItem.objects.exists())
+
+    def test_total_price(self):
+        aggregator = get_basket_aggregator(self.request)
+        aggregator.add_many([self.product1, self.product2, self.product2])
+        aggregator.create_items([
+            {"product": self.product1, "amount": 1},
+            {"product": self.product3, "amount": 5},
+        ])
+        self.assertEqual(aggregator.basket.price, Decimal(21))
+        # Distinct content types and aggregate per each content type
+        with self.assertNumQueries(3):
+            self.assertEqual(aggregator.items_aggregator.items_total_price(), Decimal(21))
+
+    def test_total_price_without_price_column(self):
+        aggregator = get_basket_aggregator(self.request)
+        basket_item = BasketItem.objects.create(product=self.product1, amount=2, price=4)
+        aggregator.add_many([self.product1, self.product2, basket_item])
+        ContentType.objects.get_for_models(Product, BasketItem)
+        # Prices of all models are properties
+        with mock.patch("django_basket.contrib.item.has_price_column", return_value=False):
+            # Distinct content types, items loading and `in_bulk` per content type
+            with self.assertNumQueries(4):
+                self.assertEqual(aggregator.items_aggregator.items_total_price(), Decimal(7))
+        # Only product price is property
+        with mock.patch("django_basket.contrib.item.has_price_column", side_effect=lambda model: model is BasketItem):
+            # Distinct content types, basket items aggregate, products loading and `in_bulk`
+            with self.assertNumQueries(4):
+                self.assertEqual(aggregator.items_aggregator.items_total_price(), Decimal(7))
+
+    def test_incremental_pricing(self):
+        with overwrite_settings(is_incremental_pricing=True):
+            aggregator = get_basket_aggregator(self.request)
+            item1, item2, item3 = aggregator.add_many([self.product1, self.product2, self.product3])
+            self.assertEqual(aggregator.basket.price, Decimal(6))
+            aggregator.remove([item1, item3])
+            self.assertEqual(aggregator.basket.price, Decimal(2))
+            self.assertEqual(aggregator.reconcile_price(), Decimal(0))
+
+    def test_merging(self):
+        basket = BasketAggregator(get_empty_basket())
+        proxy = BasketAggregator(get_empty_basket())
+        basket.add_many([self.product1])
+        proxy_items = proxy.add_many([self.product2, self.product3])
+        merge(basket.basket, proxy.basket)
+        self.assertEqual(BaseBasket.objects.count(), 1)
+        self.assertEqual(DynamicBasketItem.objects.count(), 3)
+        for item in proxy_items:
+            self.assertIn(item, basket.basket.basket_items.all())
+        self.assertEqual(basket.basket.price, Decimal(6))
+
+    def test_bulk_item_creation(self):
+        Product.objects.bulk_create([
+            Product(title=f"bulk{index}", price=index) for index in range(100)
+        ])
+        products = list(Product.objects.filter(title__startswith="bulk").order_by("pk"))
+        ContentType.objects.get_for_model(Product)
+        features = connection.features
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", True, create=True), \
+                mock.patch.object(features, "can_return_ids_from_bulk_insert", True, create=True), \
+                mock.patch.object(DynamicBasketItem.objects, "bulk_create", side_effect=lambda objs: objs) as bulk_create:
+            with self.assertNumQueries(0):
+                items = DynamicBasketItem.create_item(products)
+        bulk_create.assert_called_once_with(items)
+        self.assertEqual([item.object_id for item in items], [product.pk for product in products])
+        with self.assertNumQueries(0):
+            self.assertEqual([item.content_object for item in items], products)
+
+    def test_bulk_item_creation_reselecting(self):
+        Product.objects.bulk_create([
+            Product(title=f"bulk{index}", price=index) for index in range(100)
+        ])
+        products = list(Product.objects.filter(title__startswith="bulk").order_by("pk"))
+        ContentType.objects.get_for_model(Product)
+        DynamicBasketItem.create_item([self.product1])
+        # Savepoint, insertion, re-selection and savepoint releasing
+        with self.assertNumQueries(4):
+            items = DynamicBasketItem.create_item(products)
+        self.assertEqual(DynamicBasketItem.objects.count(), 101)
+        for item, product in zip(items, products):
+            self.assertEqual(DynamicBasketItem.objects.get(pk=item.pk).object_id, product.pk)
+
+    def test_bulk_item_creation_last_insert_id(self):
+        DynamicBasketItem.create_item([self.product1])
+        first_pk = DynamicBasketItem.objects.latest("pk").pk + 1
+        with mock.patch.object(connection, "vendor", "mysql"), \
+                mock.patch("django_basket.models.item.get_autoinc_lock_mode", return_value=1), \
+                mock.patch("django_basket.models.item.get_last_insert_id", return_value=(first_pk, 1)):
+            # Savepoint, insertion and savepoint releasing
+            with self.assertNumQueries(3):
+                items = DynamicBasketItem.create_item([self.product2, self.product3])
+        self.assertEqual(
+            list(DynamicBasketItem.objects.filter(pk__gte=first_pk).order_by("pk").values_list("pk", "object_id")),
+            [(item.pk, item.object_id) for item in items],
+        )
+        self.assertEqual([item.object_id for item in items], [self.product2.pk, self.product3.pk])
+
+    def test_item_creation_without_returning_rows(self):
+        with mock.patch.object(connection, "vendor", "mysql"), \
+                mock.patch("django_basket.models.item.get_autoinc_lock_mode", return_value=2):
+            # Savepoint, insertion per product and savepoint releasing
+            with self.assertNumQueries(4):
+                items = DynamicBasketItem.create_item([self.product1, self.product2])
+        self.assertEqual(
+            list(DynamicBasketItem.objects.order_by("pk").values_list("pk", "object_id")),
+            [(item.pk, item.object_id) for item in items],
+        )
+        self.assertEqual([item.object_id for item in items], [self.product1.pk, self.product2.pk])
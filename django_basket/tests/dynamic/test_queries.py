@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+
+from rest_framework.test import APITestCase
+
+from django_basket.contrib.basket import BasketAggregator
+from django_basket.contrib.merging import merge, merge_baskets
+from django_basket.contrib.selectors import get_basket, get_empty_basket, get_session_keys_basket
+from django_basket.models import BaseBasket
+from django_basket.shortcuts import get_basket_items_amount
+
+from example_apps.products.models import Product, BasketItem
+from ..utils import QueryBudgetMixin
+
+
+User = get_user_model()
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, APITestCase):
+    """Pinned queries amounts of basket views and operations for dynamic basket items"""
+
+    def setUp(self):
+        self.user = User.objects.create_user("user", "user@mail.com", "password")
+        self.product = Product.objects.create(title="title", price=1)
+        # Content types are cached by process, cache filling isn't budgeted
+        ContentType.objects.get_for_models(Product, BasketItem)
+        # Session and basket are created by first request
+        self.client.get("/api/basket/receive/")
+        self.basket = BaseBasket.objects.get()
+        self.items = BasketAggregator(self.basket).add_many(self.create_items(10))
+
+    def create_items(self, amount: int):
+        return [
+            BasketItem.objects.create(product=self.product, amount=1, price=self.product.price)
+            for _ in range(amount)
+        ]
+
+    def test_receive_view(self):
+        # Session loading and existence checking, basket resolving, items and content objects serialization
+        with self.assertQueryBudget(5):
+            self.client.get("/api/basket/receive/")
+
+    def test_amount_view(self):
+        with self.assertQueryBudget(4):
+            self.client.get("/api/basket/amount/")
+
+    def test_adding_view(self):
+        items = self.create_items(10)
+        with self.assertQueryBudget(14):
+            self.client.post("/api/basket/add/", {"basket_items": [item.pk for item in items]}, format="json")
+
+    def test_removing_view(self):
+        with self.assertQueryBudget(14):
+            self.client.post(
+                "/api/basket/remove/", {"basket_items": [item.pk for item in self.items[:5]]}, format="json"
+            )
+
+    def test_items_creation_view(self):
+        with self.assertQueryBudget(23):
+            self.client.post(
+                "/api/basket/create/items/",
+                {"basket_items": [{"product": self.product.pk, "amount": 1}] * 5},
+                format="json",
+            )
+
+    def test_cleaning_view(self):
+        with self.assertQueryBudget(10):
+            self.client.post("/api/basket/clean/")
+
+    def test_batch_view(self):
+        items = self.create_items(5)
+        with self.assertQueryBudget(22):
+            self.client.post(
+                "/api/basket/batch/",
+                {"operations": [
+                    {"operation": "add", "basket_items": [item.pk for item in items]},
+                    {"operation": "remove", "basket_items": [item.pk for item in self.items[:5]]},
+                ]},
+                format="json",
+            )
+
+    def test_aggregator_adding(self):
+        items = self.create_items(10)
+        with self.assertQueryBudget(8):
+            BasketAggregator(self.basket).add_many(items)
+
+    def test_aggregator_removing(self):
+        with self.assertQueryBudget(8):
+            BasketAggregator(self.basket).remove(self.items[:5])
+
+    def test_aggregator_emptying(self):
+        with self.assertQueryBudget(7):
+            BasketAggregator(self.basket).empty_basket()
+
+    def test_aggregator_price_calculation(self):
+        with self.assertQueryBudget(3):
+            BasketAggregator(self.basket).calculate_price()
+
+    def test_aggregator_batch(self):
+        items = self.create_items(5)
+        aggregator = BasketAggregator(self.basket)
+        with self.assertQueryBudget(15):
+            with aggregator.batch():
+                aggregator.add_many(items)
+                aggregator.remove(self.items[:5])
+
+    def test_items_amount(self):
+        with self.assertQueryBudget(1):
+            get_basket_items_amount(self.basket)
+
+    def test_session_basket_resolving(self):
+        with self.assertQueryBudget(1):
+            get_session_keys_basket(self.basket.session_id, "old_session", self.user)
+
+    def test_session_basket_creation(self):
+        with self.assertQueryBudget(4):
+            get_session_keys_basket("new_session")
+
+    def test_basket_getting(self):
+        with self.assertQueryBudget(1):
+            get_basket(session_id=self.basket.session_id)
+
+    def test_merging(self):
+        proxy = get_empty_basket(session_id="proxy_session")
+        BasketAggregator(proxy).add_many(self.create_items(5))
+        with self.assertQueryBudget(10):
+            merge(self.basket, proxy)
+
+    def test_bulk_merging(self):
+        proxies = []
+        for index in range(3):
+            proxy = get_empty_basket(session_id=f"proxy_session{index}")
+            BasketAggregator(proxy).add_many(self.create_items(2))
+            proxies.append(proxy)
+        with self.assertQueryBudget(10):
+            merge_baskets(self.basket, proxies)
@@ -0,0 +1,47 @@
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.contrib.auth import get_user_model
+
+from django_basket.rest.serializers import BasketSerializer, BasketItemsSerializer
+from django_basket.shortcuts import get_basket_aggregator
+
+from example_apps.products.models import Product
+
+
+User = get_user_model()
+
+
+class BasketSerializerTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("user", "user@mail.com", "password")
+        # Mock request
+        self.request = RequestFactory().get("/admin/login/")
+        self.request.session = self.client.session
+        self.request.user = self.user
+        # Products
+        self.product1 = Product.objects.create(title="title1", price=1)
+        self.product2 = Product.objects.create(title="title2", price=2)
+
+    def test_items_serialization(self):
+        aggregator = get_basket_aggregator(self.request)
+        items = aggregator.create_items([
+            {"product": self.product1, "amount": 1},
+            {"product": self.product2, "amount": 3},
+        ])
+        data = BasketSerializer(aggregator.basket).data
+        self.assertEqual(
+            [item["item"] for item in data["basket_items"]],
+            [BasketItemsSerializer(item.content_object).data for item in items],
+        )
+
+    def test_items_serialization_queries(self):
+        aggregator = get_basket_aggregator(self.request)
+        aggregator.create_items([
+            {"product": self.product1, "amount": amount}
+            for amount in range(1, 21)
+        ])
+        # Basket items and content objects of the single content type
+        with self.assertNumQueries(2):
+            data = BasketSerializer(aggregator.basket).data
+        self.assertEqual(len(data["basket_items"]), 20)
@@ -23,7 +23,9 @@ class Migration(migrations.Migration):
                 ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
                 ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
                 ('price', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=10, verbose_name='Price')),
-                ('session_id', models.CharField(blank=True, max_length=255, null=True, verbose_name='Session id')),
+                ('items_amount', models.PositiveIntegerField(default=0, verbose_name='Items amount')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Version')),
+                ('session_id', models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='Session id')),
                 ('basket_items', models.ManyToManyField(blank=True, related_name='basket', to='products.BasketItem', verbose_name='Basket item')),
                 ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='User')),
             ],
@@ -32,4 +34,8 @@ class Migration(migrations.Migration):
                 'verbose_name_plural': 'Baskets',
             },
         ),
+        migrations.AddIndex(
+            model_name='basebasket',
+            index=models.Index(fields=['user', 'updated_at'], name='basket_user_updated_at_idx'),
+        ),
     ]
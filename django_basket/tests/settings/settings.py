@@ -21,6 +21,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'django_basket.middleware.BasketMiddleware',
 ]
 
 AUTHENTICATION_BACKENDS = [
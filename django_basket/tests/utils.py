@@ -1,6 +1,9 @@
 from contextlib import contextmanager
 from copy import deepcopy
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from django_basket.settings import basket_settings
 
 
@@ -12,3 +15,22 @@ def overwrite_settings(**settings):
         yield
     finally:
         basket_settings._settings.update(default_settings)
+
+
+class QueryBudgetMixin:
+    """Test case mixin, which pins queries amount of operations"""
+
+    @contextmanager
+    def assertQueryBudget(self, budget: int, is_exact: bool = True):
+        """
+            Fail with captured SQL if context executes more queries than budget,
+            or less, if budget is exact and should be tightened.
+        """
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget or (is_exact and executed != budget):
+            queries = "\n".join(
+                f"{number}. {query['sql']}" for number, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{executed} queries executed, query budget is {budget}:\n{queries}")
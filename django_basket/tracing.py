@@ -0,0 +1,193 @@
+import json
+import secrets
+import time
+from collections import deque
+from threading import Lock, local
+from typing import Any, Dict, List, Optional
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import basket_settings
+from .utils import lazy_module, load_module
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    # Python 3.6
+    ContextVar = None
+
+try:
+    from opentelemetry import context as otel_context, trace as otel_trace
+except ImportError:
+    otel_context = otel_trace = None
+
+
+__all__ = (
+    "Span",
+    "InMemorySpanExporter",
+    "FileSpanExporter",
+    "OpenTelemetryExporter",
+    "memory_exporter",
+    "get_current_span",
+    "start_span",
+    "finish_span",
+)
+
+
+class ThreadLocalVar(local):
+    """Replacement of `contextvars.ContextVar` on Python 3.6, value is kept per thread"""
+
+    def __init__(self, name: str, default: Any = None):
+        self.name = name
+        self.value = default
+
+    def get(self) -> Any:
+        return self.value
+
+    def set(self, value: Any) -> Any:
+        # Previous value is token of resetting
+        token, self.value = self.value, value
+        return token
+
+    def reset(self, token: Any):
+        self.value = token
+
+
+def time_ns() -> int:
+    """Epoch nanoseconds, `time.time_ns()` requires Python 3.7"""
+    return time.time_ns() if hasattr(time, "time_ns") else int(time.time() * 10 ** 9)
+
+
+_current_span = (ContextVar or ThreadLocalVar)("django_basket_span", default=None)
+
+
+class Span:
+    """Timed basket operation, nested in operation which was running when it's started"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.attributes: Dict[str, Any] = {}
+        # Epoch nanoseconds
+        self.start_time = time_ns()
+        self.end_time: Optional[int] = None
+        # Exporters state, like wrapped third party span
+        self.context: Dict[str, Any] = {}
+        self._token = None
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        return self.parent.span_id if self.parent else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """Receive started and finished spans, finished spans are received in order of finishing"""
+
+    def start(self, span: Span):
+        pass
+
+    def export(self, span: Span):
+        raise NotImplementedError
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keep last finished spans, used by tests and local debugging"""
+
+    def __init__(self, size: int = 10000):
+        self.spans = deque(maxlen=size)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        return list(self.spans)
+
+    def clear(self):
+        self.spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """Append finished spans to file as JSON lines, file is configured by `tracing_file` setting"""
+
+    def __init__(self, path: str = None):
+        self.path = path or basket_settings.tracing_file
+        if not self.path:
+            raise ImproperlyConfigured("Spans file exporting requires `tracing_file` setting")
+        self._lock = Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, "a") as file:
+            file.write(line + "\n")
+
+
+class OpenTelemetryExporter(SpanExporter):
+    """
+        Mirror spans by OpenTelemetry spans of `django_basket` tracer,
+        which are current while basket operation is running, so they are nested in application traces.
+    """
+
+    def __init__(self):
+        if otel_trace is None:
+            raise ImproperlyConfigured("OpenTelemetry spans exporting requires `opentelemetry-api` package")
+        self.tracer = otel_trace.get_tracer("django_basket")
+
+    def start(self, span: Span):
+        otel_span = self.tracer.start_span(span.name)
+        span.context["otel"] = (otel_span, otel_context.attach(otel_trace.set_span_in_context(otel_span)))
+
+    def export(self, span: Span):
+        otel_span, token = span.context.pop("otel")
+        otel_span.set_attributes(span.attributes)
+        otel_context.detach(token)
+        otel_span.end(end_time=span.end_time)
+
+
+memory_exporter = InMemorySpanExporter()
+
+
+@lazy_module
+def get_exporters() -> List[SpanExporter]:
+    exporters = []
+    for path in basket_settings.tracing_exporters or ():
+        exporter = load_module(path)
+        # Exporter classes are instantiated once, when setting is read
+        exporters.append(exporter() if isinstance(exporter, type) else exporter)
+    return exporters
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str) -> Span:
+    """Start span nested in current one and make it current"""
+    # Misconfigured exporters fail before span becomes current
+    exporters = get_exporters()
+    span = Span(name, parent=_current_span.get())
+    span._token = _current_span.set(span)
+    for exporter in exporters:
+        exporter.start(span)
+    return span
+
+
+def finish_span(span: Span, attributes: Dict[str, Any]):
+    """Finish current span with attributes, `None` valued attributes are skipped"""
+    span.end_time = time_ns()
+    span.attributes.update({key: value for key, value in attributes.items() if value is not None})
+    _current_span.reset(span._token)
+    for exporter in get_exporters():
+        exporter.export(span)
@@ -1,12 +1,18 @@
-from typing import Callable, Any, Optional
+import sys
+import timeit
+import types
+from functools import wraps, lru_cache
+from typing import Callable, Any, Optional, Dict, Tuple, List
 from django.utils.module_loading import import_string
 
+from .settings import basket_settings
 
-__all__ = ("load_module", "settings_function")
+
+__all__ = ("load_module", "lazy_module", "lazy_module_attributes", "settings_function", "hooks")
 
 
 def load_module(
-    path: str, 
+    path: str,
     default: Any = None,
     check: Callable[[Any], bool] = None
 ) -> Optional[Any]:
@@ -19,17 +25,109 @@ def load_module(
     return default
 
 
-def settings_function(func_path):
-    # TODO: Make collection of executable
+class HookRegistry:
+    """
+        Registry of functions which could be replaced by settings configured callables.
+        Configured callables are resolved once, on application ready or first call.
+    """
+
+    def __init__(self):
+        self.hooks: Dict[Callable, Tuple[Optional[str], Optional[str]]] = {}
+        self.compiled: Dict[Callable, Callable] = {}
+        self.loaders: List[Callable] = []
+
+    def register(self, func: Callable, func_path: str = None, setting: str = None):
+        self.hooks[func] = (func_path, setting)
+
+    def resolve(self, func: Callable) -> Callable:
+        """Resolve callable configured for default function and cache it"""
+        func_path, setting = self.hooks[func]
+        if setting:
+            func_path = getattr(basket_settings, setting)
+        self.compiled[func] = load_module(
+            func_path,
+            default=func,
+            check=lambda module: callable(module),
+        )
+        return self.compiled[func]
+
+    def compile(self):
+        for func in self.hooks:
+            self.resolve(func)
+
+    def clear(self):
+        # Clear in place, compiled collection is bound in hooked functions
+        self.compiled.clear()
+        for loader in self.loaders:
+            loader.cache_clear()
+
+    def measure_overhead(self, number: int = 100000) -> float:
+        """Measure average time of hooked function dispatching, in seconds per call"""
+        def func():
+            pass
+
+        hooked = hook(self, func)
+        try:
+            direct_time = timeit.timeit(func, number=number)
+            hooked_time = timeit.timeit(hooked, number=number)
+        finally:
+            del self.hooks[func]
+            self.compiled.pop(func, None)
+        return (hooked_time - direct_time) / number
+
+
+hooks = HookRegistry()
+
+
+def hook(registry: HookRegistry, func: Callable, func_path: str = None, setting: str = None) -> Callable:
+    registry.register(func, func_path, setting)
+    compiled = registry.compiled
+
+    @wraps(func)
+    def wrapped(*args, **kwargs):
+        _func = compiled.get(func) or registry.resolve(func)
+        return _func(*args, **kwargs)
+    return wrapped
+
+
+def lazy_module(func: Callable) -> Callable:
+    """
+        Memoize module loading function, so settings configured modules
+        are loaded on first use instead of import. Memoized modules are dropped with compiled hooks.
+    """
+    loader = lru_cache(maxsize=None)(func)
+    hooks.loaders.append(loader)
+    return loader
+
+
+def lazy_module_attributes(module_name: str, getters: Dict[str, Callable[[], Any]]):
+    """
+        Resolve module attributes by getters on access, like module `__getattr__`,
+        which isn't supported by Python 3.6.
+
+        Args:
+            module_name: str - name of module with lazy attributes
+            getters: Dict[str, Callable[[], Any]] - attribute getters by attributes names
+    """
+    class LazyAttributesModule(types.ModuleType):
+
+        def __getattr__(self, name: str) -> Any:
+            if name in getters:
+                return getters[name]()
+            raise AttributeError(f"module {self.__name__!r} has no attribute {name!r}")
+
+    sys.modules[module_name].__class__ = LazyAttributesModule
+
+
+def settings_function(func_path: str = None, setting: str = None):
+    """
+        Replace decorated function by callable configured in settings.
+
+        Args:
+            func_path: Optional[str] - path to configured callable
+            setting: Optional[str] - name of basket setting which contains path to configured callable,
+                is re-read when `DJANGO_BASKET` setting is changed
+    """
     def wrapper(func):
-        def wrapped(*args, **kwargs):
-            _func = func
-            if func_path:
-                _func = load_module(
-                    func_path,
-                    default=func,
-                    check=lambda module: callable(module),
-                )
-            return _func(*args, **kwargs)
-        return wrapped
+        return hook(hooks, func, func_path, setting)
     return wrapper